@@ -844,6 +844,27 @@ class Cache:
 CACHE = Cache()
 
 
+def _cache_file_path(owner, args, hash_extra, extension):
+    m = hashlib.sha256()
+    m.update(owner.encode("utf-8"))
+
+    m.update(
+        json.dumps(args, sort_keys=True, default=default_serialiser).encode("utf-8")
+    )
+    m.update(json.dumps(hash_extra, sort_keys=True).encode("utf-8"))
+    m.update(json.dumps(extension, sort_keys=True).encode("utf-8"))
+
+    return os.path.join(
+        CACHE.cache_directory(),
+        # SETTINGS.get("cache-directory"),
+        "{}-{}{}".format(
+            owner.lower(),
+            m.hexdigest(),
+            extension,
+        ),
+    )
+
+
 def cache_file(
     owner: str,
     create,
@@ -871,29 +892,12 @@ def cache_file(
     if not CACHE.policy.has_cache() or CACHE.cache_directory() is None:
         raise RuntimeError("Cache is disabled. Cannot create cache file.")
 
-    m = hashlib.sha256()
-    m.update(owner.encode("utf-8"))
-
-    m.update(
-        json.dumps(args, sort_keys=True, default=default_serialiser).encode("utf-8")
-    )
-    m.update(json.dumps(hash_extra, sort_keys=True).encode("utf-8"))
-    m.update(json.dumps(extension, sort_keys=True).encode("utf-8"))
-
     if replace is not None:
         # Don't replace files that are not in the cache
         if not CACHE.file_in_cache_directory(replace):
             replace = None
 
-    path = os.path.join(
-        CACHE.cache_directory(),
-        # SETTINGS.get("cache-directory"),
-        "{}-{}{}".format(
-            owner.lower(),
-            m.hexdigest(),
-            extension,
-        ),
-    )
+    path = _cache_file_path(owner, args, hash_extra, extension)
 
     record = CACHE.register_cache_file(path, owner, args)
     if os.path.exists(path):
@@ -926,6 +930,18 @@ def cache_file(
     return path
 
 
+def _auxiliary_cache_args(path, index):
+    # the auxiliary files are invalidated if `path` is changed
+    stat = os.stat(path)
+    return (
+        path,
+        stat.st_ctime,
+        stat.st_mtime,
+        stat.st_size,
+        index,
+    )
+
+
 def auxiliary_cache_file(
     owner,
     path,
@@ -936,8 +952,6 @@ def auxiliary_cache_file(
     # Create an auxiliary cache file
     # to be used for example to cache an index
     # It is invalidated if `path` is changed
-    stat = os.stat(path)
-
     def create(target, args):
         # Simply touch the file
         with open(target, "w") as f:
@@ -947,16 +961,24 @@ def auxiliary_cache_file(
     return cache_file(
         owner,
         create,
-        (
-            path,
-            stat.st_ctime,
-            stat.st_mtime,
-            stat.st_size,
-            index,
-        ),
+        _auxiliary_cache_args(path, index),
         extension=extension,
     )
 
 
+def existing_auxiliary_cache_file(owner, path, index=0, extension=".cache"):
+    # Return the auxiliary cache file created by auxiliary_cache_file()
+    # or None if it does not exist. No file is created.
+    if not CACHE.policy.has_cache() or CACHE.cache_directory() is None:
+        return None
+
+    target = _cache_file_path(
+        owner, _auxiliary_cache_args(path, index), None, extension
+    )
+    if os.path.exists(target):
+        return target
+    return None
+
+
 # housekeeping()
 SETTINGS.on_change(CACHE.settings_changed)
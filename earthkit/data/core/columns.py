@@ -0,0 +1,213 @@
+# (C) Copyright 2023 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+#
+
+import functools
+import logging
+
+import numpy as np
+
+LOG = logging.getLogger(__name__)
+
+
+def _codes_dtype(n):
+    return np.int32 if n < 2**31 else np.int64
+
+
+class MetadataColumn:
+    r"""Categorical column storing the values of a metadata key for all the
+    elements of an index.
+
+    Parameters
+    ----------
+    codes: ndarray
+        One integer per element referring to an item in ``values``.
+    values: list
+        The distinct (hashable) metadata values.
+    """
+
+    def __init__(self, codes, values):
+        self.codes = codes
+        self.values = values
+
+    @classmethod
+    def from_values(cls, values):
+        r"""Create a column by factorising ``values``.
+
+        Raises
+        ------
+        TypeError
+            When any of the values is not hashable.
+        """
+        lookup = {}
+        uniques = []
+        codes = np.empty(len(values), dtype=_codes_dtype(len(values)))
+        for i, v in enumerate(values):
+            # 1 and True or 1 and 1.0 are equal as dict keys, but must not
+            # be merged since their types can matter in the comparisons
+            k = (type(v), v)
+            c = lookup.get(k)
+            if c is None:
+                c = lookup[k] = len(uniques)
+                uniques.append(v)
+            codes[i] = c
+        return cls(codes, uniques)
+
+    @classmethod
+    def concat(cls, columns):
+        r"""Concatenate ``columns`` into a new column."""
+        lookup = {}
+        uniques = []
+        codes = []
+        for c in columns:
+            remap = np.empty(len(c.values), dtype=np.int64)
+            for i, v in enumerate(c.values):
+                k = (type(v), v)
+                r = lookup.get(k)
+                if r is None:
+                    r = lookup[k] = len(uniques)
+                    uniques.append(v)
+                remap[i] = r
+            codes.append(remap[c.codes] if len(c.codes) else c.codes)
+
+        n = sum(len(c) for c in codes)
+        codes = (
+            np.concatenate(codes).astype(_codes_dtype(n), copy=False)
+            if codes
+            else np.empty(0, dtype=np.int32)
+        )
+        return cls(codes, uniques)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, n):
+        return self.values[self.codes[n]]
+
+    def take(self, indices):
+        r"""Return a new column with the elements at ``indices``."""
+        return MetadataColumn(self.codes[indices], self.values)
+
+    def _used_codes(self):
+        # the codes present in the column in the order of first appearance
+        used, first = np.unique(self.codes, return_index=True)
+        return used[np.argsort(first, kind="stable")]
+
+    def unique(self):
+        r"""Return the distinct values present in the column in order of first appearance."""
+        return [self.values[c] for c in self._used_codes()]
+
+    def mask(self, func):
+        r"""Evaluate ``func`` on the distinct values and broadcast the result to
+        all the elements.
+
+        The values are visited in the same order as they would be when
+        iterating over the elements, so stateful callables (e.g. lazy casting in
+        :obj:`Selection`) behave identically.
+
+        Returns
+        -------
+        ndarray of bool
+        """
+        r = np.zeros(len(self.values), dtype=bool)
+        for c in self._used_codes():
+            r[c] = bool(func(self.values[c]))
+        return r[self.codes]
+
+    def rank(self, cmp):
+        r"""Rank the elements using the comparison function ``cmp``.
+
+        ``cmp`` is only called on the distinct values. Elements comparing
+        equal get the same rank, so the result can be used as a sort key
+        e.g. with :func:`numpy.lexsort`.
+
+        Returns
+        -------
+        ndarray of int
+        """
+        ordered = sorted(
+            self._used_codes(),
+            key=functools.cmp_to_key(lambda a, b: cmp(self.values[a], self.values[b])),
+        )
+        ranks = np.zeros(len(self.values), dtype=np.int64)
+        r = 0
+        for i, c in enumerate(ordered):
+            if i > 0 and cmp(self.values[ordered[i - 1]], self.values[c]) != 0:
+                r += 1
+            ranks[c] = r
+        return ranks[self.codes]
+
+
+def values_to_array(values, dtype=None):
+    r"""Convert a list of metadata values into a 1D ndarray.
+
+    Without ``dtype`` the type is inferred when all the values are scalars
+    of the same type, otherwise an object array is returned.
+    """
+    if dtype is not None:
+        return np.array(values, dtype=dtype)
+    if (
+        values
+        and isinstance(values[0], (int, float, str, np.number))
+        and all(type(v) is type(values[0]) for v in values)
+    ):
+        return np.array(values)
+
+    # the items are assigned one by one so that sequences are not broadcast
+    r = np.empty(len(values), dtype=object)
+    for i, v in enumerate(values):
+        r[i] = v
+    return r
+
+
+class UnhashableValuesError(TypeError):
+    r"""Raised when some metadata values cannot be stored in a
+    :obj:`MetadataColumn`.
+
+    Parameters
+    ----------
+    values: dict
+        The list of values extracted for each key, so they do not have to be
+        extracted again.
+    """
+
+    def __init__(self, values):
+        super().__init__(f"unhashable metadata values for keys={list(values)}")
+        self.values = values
+
+
+def columns_from_rows(rows, keys):
+    r"""Build a :obj:`MetadataColumn` per key from ``rows``, which contain the
+    values of all the ``keys`` for each element.
+
+    Raises
+    ------
+    UnhashableValuesError
+        When any of the values is not hashable.
+    """
+    keys = list(keys)
+    values = [[] for _ in keys]
+    for row in rows:
+        for lst, v in zip(values, row):
+            lst.append(v)
+    try:
+        return {k: MetadataColumn.from_values(v) for k, v in zip(keys, values)}
+    except TypeError as e:
+        raise UnhashableValuesError(dict(zip(keys, values))) from e
+
+
+def columns_from_elements(elements, keys):
+    r"""Build a :obj:`MetadataColumn` per key in a single pass over ``elements``.
+
+    For each element all the ``keys`` are extracted at once with
+    ``element.metadata(keys, default=None)``.
+    """
+    keys = list(keys)
+    return columns_from_rows(
+        (element.metadata(keys, default=None) for element in elements), keys
+    )
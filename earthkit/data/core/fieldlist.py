@@ -8,7 +8,6 @@
 #
 
 from abc import abstractmethod
-from collections import defaultdict
 
 from earthkit.data.core import Base
 from earthkit.data.core.index import Index
@@ -16,6 +15,15 @@ from earthkit.data.decorators import cached_method
 from earthkit.data.utils.metadata import metadata_argument
 
 
+def _dtype_or_default(dtype):
+    # when no dtype is specified the one in the settings is used
+    if dtype is None:
+        from earthkit.data.core.settings import SETTINGS
+
+        dtype = SETTINGS.get("default-dtype")
+    return dtype
+
+
 class Field(Base):
     r"""Represents a Field."""
 
@@ -44,7 +52,7 @@ class Field(Base):
     @property
     def values(self):
         r"""ndarray: Get the values stored in the field as a 1D ndarray."""
-        return self._values()
+        return self._values(dtype=_dtype_or_default(None))
 
     def _make_metadata(self):
         r"""Create a field metadata object."""
@@ -57,6 +65,11 @@ class Field(Base):
             self.__metadata = self._make_metadata()
         return self.__metadata
 
+    def _clear_metadata(self):
+        r"""Drop the metadata object, which is then created again by
+        :meth:`_make_metadata` when needed."""
+        self.__metadata = None
+
     def to_numpy(self, flatten=False, dtype=None):
         r"""Return the values stored in the field as an ndarray.
 
@@ -66,8 +79,10 @@ class Field(Base):
             When it is True a flat ndarray is returned. Otherwise an ndarray with the field's
             :obj:`shape` is returned.
         dtype: str, numpy.dtype or None
-            Typecode or data-type of the array. When it is :obj:`None` the default
-            type used by the underlying data accessor is used. For GRIB it is ``np.float64``.
+            Typecode or data-type of the array. When it is :obj:`None` the
+            ``default-dtype`` :ref:`setting <settings>` is used. When that is also
+            :obj:`None` the default type used by the underlying data accessor is
+            used. For GRIB it is ``np.float64``.
 
         Returns
         -------
@@ -75,12 +90,9 @@ class Field(Base):
             Field values
 
         """
-        values = self.values
+        values = self._values(dtype=_dtype_or_default(dtype))
         if not flatten:
-            # values = self.values.reshape(self.shape)
-            values = self._values(dtype=dtype).reshape(self.shape)
-        if dtype is not None:
-            values = values.astype(dtype)
+            values = values.reshape(self.shape)
         return values
 
     def data(self, keys=("lat", "lon", "value"), flatten=False, dtype=None):
@@ -95,8 +107,10 @@ class Field(Base):
             When it is True a flat ndarray per key is returned. Otherwise an ndarray with the field's
             :obj:`shape` is returned for each key.
         dtype: str, numpy.dtype or None
-            Typecode or data-type of the arrays. When it is :obj:`None` the default
-            type used by the underlying data accessor is used. For GRIB it is ``np.float64``.
+            Typecode or data-type of the arrays. When it is :obj:`None` the
+            ``default-dtype`` :ref:`setting <settings>` is used. When that is also
+            :obj:`None` the default type used by the underlying data accessor is
+            used. For GRIB it is ``np.float64``.
 
 
         Returns
@@ -136,6 +150,7 @@ class Field(Base):
         values
 
         """
+        dtype = _dtype_or_default(dtype)
         _keys = dict(
             lat=self._metadata.geography.latitudes,
             lon=self._metadata.geography.longitudes,
@@ -170,9 +185,10 @@ class Field(Base):
             When it is True 1D ndarrays are returned. Otherwise ndarrays with the field's
             :obj:`shape` are returned.
         dtype: str, numpy.dtype or None
-            Typecode or data-type of the arrays. When it is :obj:`None` the default
-            type used by the underlying data accessor is used. For GRIB it is
-            ``np.float64``.
+            Typecode or data-type of the arrays. When it is :obj:`None` the
+            ``default-dtype`` :ref:`setting <settings>` is used. When that is also
+            :obj:`None` the default type used by the underlying data accessor is
+            used. For GRIB it is ``np.float64``.
 
         Returns
         -------
@@ -190,6 +206,7 @@ class Field(Base):
         to_latlon
 
         """
+        dtype = _dtype_or_default(dtype)
         x = self._metadata.geography.x(dtype=dtype)
         y = self._metadata.geography.y(dtype=dtype)
         if x is not None and y is not None:
@@ -199,7 +216,10 @@ class Field(Base):
                 y = y.reshape(shape)
             return dict(x=x, y=y)
         elif self.projection().CARTOPY_CRS == "PlateCarree":
-            lon, lat = self.data(("lon", "lat"), flatten=flatten, dtype=dtype)
+            # the coordinates are taken one by one to avoid copying them into
+            # a single array
+            lon = self.data("lon", flatten=flatten, dtype=dtype)
+            lat = self.data("lat", flatten=flatten, dtype=dtype)
             return dict(x=lon, y=lat)
         else:
             raise ValueError(
@@ -215,9 +235,10 @@ class Field(Base):
             When it is True 1D ndarrays are returned. Otherwise ndarrays with the field's
             :obj:`shape` are returned.
         dtype: str, numpy.dtype or None
-            Typecode or data-type of the arrays. When it is :obj:`None` the default
-            type used by the underlying data accessor is used. For GRIB it is
-            ``np.float64``.
+            Typecode or data-type of the arrays. When it is :obj:`None` the
+            ``default-dtype`` :ref:`setting <settings>` is used. When that is also
+            :obj:`None` the default type used by the underlying data accessor is
+            used. For GRIB it is ``np.float64``.
 
         Returns
         -------
@@ -230,7 +251,10 @@ class Field(Base):
         to_points
 
         """
-        lon, lat = self.data(("lon", "lat"), flatten=flatten, dtype=dtype)
+        # the coordinates are taken one by one to avoid copying them into
+        # a single array
+        lon = self.data("lon", flatten=flatten, dtype=dtype)
+        lat = self.data("lat", flatten=flatten, dtype=dtype)
         return dict(lat=lat, lon=lon)
 
     @property
@@ -526,8 +550,6 @@ class Field(Base):
 class FieldList(Index):
     r"""Represents a list of :obj:`Field` \s."""
 
-    _indices = {}
-
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -553,24 +575,18 @@ class FieldList(Index):
         else:
             return []
 
-    def _find_index_values(self, key):
-        values = set()
-        for f in self:
-            v = f.metadata(key, default=None)
-            if v is not None:
-                values.add(v)
-        return sorted(list(values))
-
-    def _find_all_index_dict(self):
-        indices = defaultdict(set)
-        for f in self:
-            for k in self._default_index_keys():
-                v = f.metadata(k, default=None)
-                if v is None:
-                    continue
-                indices[k].add(v)
-
-        return {k: sorted(list(v)) for k, v in indices.items()}
+    def _find_index_dict(self, keys):
+        # the values are taken from the metadata columns, which are built in a
+        # single pass over the fields and shared with the derived fieldlists
+        columns = self._metadata_columns(keys)
+        return {
+            k: sorted(set(v for v in columns[k].unique() if v is not None))
+            for k in keys
+        }
+
+    def _clear_metadata_cache(self):
+        super()._clear_metadata_cache()
+        self.__dict__.pop("_index_values", None)
 
     def indices(self, squeeze=False):
         r"""Return the unique, sorted values for a set of metadata keys (see below)
@@ -611,12 +627,16 @@ class FieldList(Index):
         used in :obj:`indices`.
 
         """
-        if not self._indices:
-            self._indices = self._find_all_index_dict()
+        if "_index_values" not in self.__dict__:
+            self._index_values = {
+                k: v
+                for k, v in self._find_index_dict(self._default_index_keys()).items()
+                if v
+            }
         if squeeze:
-            return {k: v for k, v in self._indices.items() if len(v) > 1}
+            return {k: v for k, v in self._index_values.items() if len(v) > 1}
         else:
-            return self._indices
+            return self._index_values
 
     def index(self, key):
         r"""Return the unique, sorted values of the specified metadata ``key`` from all the fields.
@@ -645,33 +665,45 @@ class FieldList(Index):
         [300, 400, 500, 700, 850, 1000]
 
         """
-        if key in self.indices():
-            return self.indices()[key]
+        indices = self.indices()
+        if key not in indices:
+            indices.update(self._find_index_dict([key]))
+        return indices[key]
 
-        self._indices[key] = self._find_index_values(key)
-        return self._indices[key]
-
-    def to_numpy(self, **kwargs):
+    def to_numpy(self, out=None, **kwargs):
         r"""Return the field values as an ndarray. It is formed as the array of the
         :obj:`data.core.fieldlist.Field.to_numpy` values per field.
 
+        The resulting array is allocated only once and the fields are decoded
+        straight into it. The number of threads used for decoding is controlled
+        by the ``number-of-decode-threads`` :ref:`setting <settings>`.
+
         Parameters
         ----------
+        out: ndarray, None
+            Array to store the results in. It must have the shape of the result,
+            i.e. the number of fields followed by the shape of the field values.
+            It can also be a :obj:`numpy.memmap`. When it is None a new array is
+            allocated.
         **kwargs: dict, optional
             Keyword arguments passed to :obj:`data.core.fieldlist.Field.to_numpy`
 
         Returns
         -------
         ndarray
-            Array containing the field values.
+            Array containing the field values. When ``out`` is specified it is
+            returned.
+
+        Raises
+        ------
+        ValueError
+            When ``out`` does not have the shape of the result.
 
         See Also
         --------
         values
         """
-        import numpy as np
-
-        return np.array([f.to_numpy(**kwargs) for f in self])
+        return self._to_array(lambda f: f.to_numpy(**kwargs), out=out)
 
     @property
     def values(self):
@@ -697,9 +729,67 @@ class FieldList(Index):
         array([262.78027344, 267.44726562, 268.61230469])
 
         """
+        return self._to_array(lambda f: f.values)
+
+    def _to_array(self, func, out=None):
+        # stack the arrays returned by func for each field into a single array
         import numpy as np
 
-        return np.array([f.values for f in self])
+        if len(self) == 0:
+            return np.array([]) if out is None else out
+
+        first = func(self[0])
+        shape = (len(self),) + first.shape
+        if out is None:
+            out = np.empty(shape, dtype=first.dtype)
+        elif out.shape != shape:
+            raise ValueError(
+                f"out has shape={out.shape}, but the result has shape={shape}"
+            )
+
+        out[0] = first
+        self._fill_rows(func, out, start=1)
+        return out
+
+    def _scheduled_fields(self, indices):
+        # Iterate over (i, self[i]) for i in indices. Subclasses can change
+        # the order to access the underlying data more efficiently.
+        for i in indices:
+            yield i, self[i]
+
+    def _metadata_rows(self, keys):
+        # the fields are visited in the same way as when reading the values
+        rows = [None] * len(self)
+        self._fill_rows(lambda f: f.metadata(keys, default=None), rows)
+        return rows
+
+    def _fill_rows(self, func, out, start=0):
+        # store the array returned by func for the i-th field into out[i], for
+        # i >= start, using multiple threads when configured so
+        from earthkit.data.core.settings import SETTINGS
+
+        num = len(self) - start
+        nthreads = min(SETTINGS.get("number-of-decode-threads"), num)
+
+        def _fill(first, last):
+            for i, f in self._scheduled_fields(range(first, last)):
+                out[i] = func(f)
+
+        if nthreads <= 1:
+            _fill(start, len(self))
+            return
+
+        from earthkit.data.core.thread import SoftThreadPool
+
+        # contiguous chunks keep the reads sequential within each thread
+        bounds = [start + (num * k) // nthreads for k in range(nthreads + 1)]
+        with SoftThreadPool(nthreads=nthreads) as pool:
+            futures = [
+                pool.submit(_fill, first, last)
+                for first, last in zip(bounds[:-1], bounds[1:])
+            ]
+            for f in futures:
+                f.result()
 
     def data(self, keys=("lat", "lon", "value"), flatten=False, dtype=None):
         r"""Return the values and/or the geographical coordinates.
@@ -715,9 +805,10 @@ class FieldList(Index):
             When it is True the "lat", "lon" arrays and the "value" arrays per field
             will all be flattened. Otherwise they will preserve the field's :obj:`shape`.
         dtype: str, numpy.dtype or None
-            Typecode or data-type of the arrays. When it is :obj:`None` the default
-            type used by the underlying data accessor is used. For GRIB it is
-            ``np.float64``.
+            Typecode or data-type of the arrays. When it is :obj:`None` the
+            ``default-dtype`` :ref:`setting <settings>` is used. When that is also
+            :obj:`None` the default type used by the underlying data accessor is
+            used. For GRIB it is ``np.float64``.
 
         Returns
         -------
@@ -773,21 +864,40 @@ class FieldList(Index):
             if isinstance(keys, str):
                 keys = [keys]
 
+            for k in keys:
+                if k not in ("lat", "lon", "value"):
+                    raise ValueError(f"data: invalid argument: {k}")
+
             if "lat" in keys or "lon" in keys:
                 latlon = self[0].to_latlon(flatten=flatten, dtype=dtype)
 
-            r = []
+            # the result is allocated once and the values are decoded into it
+            first = {k: latlon[k] for k in ("lat", "lon") if k in keys}
+            if "value" in keys:
+                first["value"] = self[0].to_numpy(flatten=flatten, dtype=dtype)
+
+            if not first:
+                return np.array([])
+
+            num = sum(len(self) if k == "value" else 1 for k in keys)
+            shape = next(iter(first.values())).shape
+            r = np.empty((num,) + shape, dtype=np.result_type(*first.values()))
+
+            pos = 0
             for k in keys:
-                if k == "lat":
-                    r.append(latlon["lat"])
-                elif k == "lon":
-                    r.append(latlon["lon"])
-                elif k == "value":
-                    r.extend([f.to_numpy(flatten=flatten, dtype=dtype) for f in self])
+                if k == "value":
+                    r[pos] = first[k]
+                    self._fill_rows(
+                        lambda f: f.to_numpy(flatten=flatten, dtype=dtype),
+                        r[pos : pos + len(self)],
+                        start=1,
+                    )
+                    pos += len(self)
                 else:
-                    raise ValueError(f"data: invalid argument: {k}")
+                    r[pos] = first[k]
+                    pos += 1
 
-            return np.array(r)
+            return r
 
         elif len(self) == 0:
             return np.array([])
@@ -828,6 +938,97 @@ class FieldList(Index):
             result.append(s.metadata(*args, **kwargs))
         return result
 
+    def metadata_table(self, keys, astype=None, output="numpy"):
+        r"""Return the values of the metadata ``keys`` for all the fields as columns.
+
+        The values are extracted in a single pass over the fields, using the
+        ``number-of-decode-threads`` :ref:`setting <settings>`, unless they are
+        already available in the index of the fieldlist. The columns are cached,
+        so subsequent calls with the same keys do not access the fields.
+
+        Parameters
+        ----------
+        keys: :obj:`str`, :obj:`list` or :obj:`tuple`
+            The metadata keys.
+        astype: type name, :obj:`list`, :obj:`tuple` or :obj:`dict`
+            The dtype of the arrays. A :obj:`list` or :obj:`tuple` specifies a
+            dtype for each key, a :obj:`dict` maps the keys to their dtype. When it
+            is None for a key the dtype is inferred from the values, and an object
+            array is returned when some values are missing or have different types.
+        output: str
+            The type of the result: "numpy" or "pandas".
+
+        Returns
+        -------
+        dict of ndarray or pandas.DataFrame
+            One 1D array or column per key.
+
+        Examples
+        --------
+        >>> import earthkit.data
+        >>> ds = earthkit.data.from_source("file", "docs/examples/test6.grib")
+        >>> r = ds.metadata_table(["param", "level"])
+        >>> r["param"]
+        array(['t', 'u', 'v', 't', 'u', 'v'], dtype='<U1')
+        >>> r["level"]
+        array([1000, 1000, 1000,  850,  850,  850])
+        >>> ds.metadata_table(["param", "level"], output="pandas")
+          param  level
+        0     t   1000
+        1     u   1000
+        2     v   1000
+        3     t    850
+        4     u    850
+        5     v    850
+        """
+        from earthkit.data.core.columns import UnhashableValuesError, values_to_array
+
+        if isinstance(keys, str):
+            keys = [keys]
+        keys = list(keys)
+
+        if isinstance(astype, dict):
+            astype = [astype.get(k) for k in keys]
+        elif not isinstance(astype, (list, tuple)):
+            astype = [astype] * len(keys)
+        elif len(astype) != len(keys):
+            raise ValueError(
+                "astype must have the same length as keys, "
+                f"{len(astype)} != {len(keys)}"
+            )
+
+        if output not in ("numpy", "pandas"):
+            raise ValueError(f"Invalid output={output}, must be 'numpy' or 'pandas'")
+
+        values = {}
+        try:
+            columns = self._metadata_columns(keys)
+        except UnhashableValuesError as e:
+            # Some values are not hashable. The values already extracted for
+            # all the fields are used and only the other keys are read again.
+            columns = self.__dict__.get("_md_columns", {})
+            values = {k: v for k, v in e.values.items() if len(v) == len(self)}
+            missing = [k for k in keys if k not in columns and k not in values]
+            if missing:
+                rows = list(self._metadata_rows(missing))
+                for j, k in enumerate(missing):
+                    values[k] = [row[j] for row in rows]
+
+        r = {}
+        for k, dtype in zip(keys, astype):
+            if k in values:
+                r[k] = values_to_array(values[k], dtype)
+            else:
+                # the values are only converted once for each distinct value
+                c = columns[k]
+                r[k] = values_to_array(c.values, dtype)[c.codes]
+
+        if output == "pandas":
+            import pandas as pd
+
+            return pd.DataFrame(r)
+        return r
+
     def ls(self, n=None, keys=None, extra_keys=None, namespace=None):
         r"""Generate a list like summary using a set of metadata keys.
 
@@ -877,14 +1078,51 @@ class FieldList(Index):
                         v.update(f._attributes(keys))
                     yield (v)
             else:
-                for i in pos_range:
-                    yield (self[i]._attributes(keys))
+                yield from self._metadata_records(keys, pos_range)
 
         _keys = (
             self._default_ls_keys() if namespace is None else dict(namespace=namespace)
         )
         return ls(_proc, _keys, n=n, keys=keys, extra_keys=extra_keys)
 
+    def _metadata_records(self, keys, indices):
+        # Return the {key: value} of the fields at indices. The values are
+        # taken from the metadata columns for all the fields or when they are
+        # available without accessing the fields (e.g. from an index). Only the
+        # other keys are read from the fields at indices.
+        from earthkit.data.core.columns import MetadataColumn, UnhashableValuesError
+
+        keys = list(keys)
+        if len(indices) == len(self):
+            column_keys = keys
+        else:
+            available = set(self._indexed_metadata_keys())
+            available.update(self.__dict__.get("_md_columns", {}))
+            column_keys = [k for k in keys if k in available]
+
+        try:
+            columns = self._metadata_columns(column_keys)
+        except UnhashableValuesError as e:
+            # Only the keys with unhashable values are read from the fields,
+            # the columns of the other keys are built from the values already
+            # extracted.
+            columns = dict(self.__dict__.get("_md_columns", {}))
+            for k, v in e.values.items():
+                if k not in columns and len(v) == len(self):
+                    try:
+                        columns[k] = MetadataColumn.from_values(v)
+                    except TypeError:
+                        pass
+
+        missing = [k for k in keys if k not in columns]
+        records = []
+        for i in indices:
+            values = self[i]._attributes(missing) if missing else {}
+            records.append(
+                {k: columns[k][i] if k in columns else values[k] for k in keys}
+            )
+        return records
+
     @cached_method
     def _default_ls_keys(self):
         if len(self) > 0:
@@ -973,8 +1211,8 @@ class FieldList(Index):
         from earthkit.data.utils.summary import format_describe
 
         def _proc():
-            for f in self:
-                yield (f._attributes(self._describe_keys()))
+            keys = self._describe_keys()
+            yield from self._metadata_records(keys, range(len(self)))
 
         return format_describe(_proc(), *args, **kwargs)
 
@@ -8,6 +8,7 @@
 #
 
 import functools
+import itertools
 import logging
 import math
 from abc import abstractmethod
@@ -16,9 +17,15 @@ from collections import defaultdict
 import numpy as np
 
 import earthkit.data
-from earthkit.data.core.order import build_remapping, normalize_order_by
+from earthkit.data.core.columns import (
+    MetadataColumn,
+    UnhashableValuesError,
+    columns_from_rows,
+)
+from earthkit.data.core.order import Remapping, build_remapping, normalize_order_by
 from earthkit.data.core.select import normalize_selection, selection_from_index
 from earthkit.data.sources import Source
+from earthkit.data.utils.offsets import CumulativeLengths
 
 LOG = logging.getLogger(__name__)
 
@@ -95,6 +102,13 @@ class Selection(OrderOrSelection):
         metadata = self.remapping(element.metadata)
         return all(v(metadata(k, default=None)) for k, v in self.actions.items())
 
+    def match_columns(self, columns):
+        mask = None
+        for k, v in self.actions.items():
+            m = columns[k].mask(v)
+            mask = m if mask is None else mask & m
+        return mask
+
 
 class OrderBase(OrderOrSelection):
     def __init__(self, kwargs, remapping):
@@ -114,6 +128,11 @@ class OrderBase(OrderOrSelection):
                 return n
         return 0
 
+    def sort_columns(self, columns):
+        # np.lexsort uses the last key as the primary one
+        keys = [columns[k].rank(v) for k, v in reversed(self.actions.items())]
+        return np.lexsort(keys)
+
 
 class Order(OrderBase):
     def build_actions(self, kwargs):
@@ -292,9 +311,15 @@ class Index(Source):
         if selection.is_empty:
             return self
 
-        indices = (
-            i for i, element in enumerate(self) if selection.match_element(element)
+        columns = self._metadata_columns_or_none(
+            selection.actions.keys(), selection.remapping
         )
+        if columns is not None:
+            indices = np.flatnonzero(selection.match_columns(columns)).tolist()
+        else:
+            indices = (
+                i for i, element in enumerate(self) if selection.match_element(element)
+            )
 
         return self.new_mask_index(self, indices)
 
@@ -500,13 +525,81 @@ class Index(Source):
         if order.is_empty:
             return self
 
-        def cmp(i, j):
-            return order.compare_elements(self[i], self[j])
+        columns = self._metadata_columns_or_none(order.actions.keys(), order.remapping)
+        if columns is not None:
+            indices = order.sort_columns(columns).tolist()
+        else:
+
+            def cmp(i, j):
+                return order.compare_elements(self[i], self[j])
+
+            indices = list(range(len(self)))
+            indices = sorted(indices, key=functools.cmp_to_key(cmp))
 
-        indices = list(range(len(self)))
-        indices = sorted(indices, key=functools.cmp_to_key(cmp))
         return self.new_mask_index(self, indices)
 
+    def _metadata_columns(self, keys):
+        r"""Return a :obj:`MetadataColumn` for each of the metadata ``keys``.
+
+        The columns are cached in the object and the missing ones are
+        built in a single pass over the elements.
+        """
+        cache = self.__dict__.setdefault("_md_columns", {})
+        missing = [k for k in keys if k not in cache]
+        if missing:
+            cache.update(self._build_metadata_columns(missing))
+        return {k: cache[k] for k in keys}
+
+    def _build_metadata_columns(self, keys):
+        keys = list(keys)
+        return columns_from_rows(self._metadata_rows(keys), keys)
+
+    def _metadata_rows(self, keys):
+        r"""Return the values of all the metadata ``keys`` for each element,
+        extracted in a single pass."""
+        return (element.metadata(keys, default=None) for element in self)
+
+    def _indexed_metadata_keys(self):
+        r"""Return the metadata keys whose columns are built without accessing
+        the elements.
+        """
+        return ()
+
+    def _clear_metadata_cache(self):
+        r"""Drop the cached metadata. Must be called when the elements change."""
+        self.__dict__.pop("_md_columns", None)
+
+    def _metadata_columns_or_none(self, keys, remapping):
+        # Returns None when the columns cannot be used, in this case the
+        # elements have to be processed one by one
+        if not isinstance(remapping, Remapping):
+            return None
+
+        base = []
+        for k in keys:
+            for b in remapping.components(k) if k in remapping else [k]:
+                if b not in base:
+                    base.append(b)
+
+        try:
+            columns = self._metadata_columns(base)
+        except UnhashableValuesError:
+            LOG.debug("Cannot build metadata columns", exc_info=True)
+            return None
+
+        r = {}
+        for k in keys:
+            if k in remapping:
+                r[k] = MetadataColumn.from_values(
+                    [
+                        remapping(lambda name, **kwargs: columns[name][i])(k)
+                        for i in range(len(self))
+                    ]
+                )
+            else:
+                r[k] = columns[k]
+        return r
+
     def __getitem__(self, n):
         if isinstance(n, slice):
             return self.from_slice(n)
@@ -517,18 +610,18 @@ class Index(Source):
         return self._getitem(n)
 
     def from_slice(self, s):
-        indices = range(len(self))[s]
+        indices = np.arange(len(self))[s]
         return self.new_mask_index(self, indices)
 
     def from_mask(self, lst):
-        indices = [i for i, x in enumerate(lst) if x]
+        indices = np.flatnonzero([bool(x) for x in lst])
         return self.new_mask_index(self, indices)
 
     def from_multi(self, a):
         # will raise IndexError if an index is out of bounds
         n = len(self)
         indices = np.arange(0, n if n > 0 else 0)
-        indices = indices[a].tolist()
+        indices = indices[a]
         return self.new_mask_index(self, indices)
 
     def from_dict(self, dic):
@@ -548,48 +641,127 @@ class Index(Source):
         return FullIndex(self, *coords)
 
 
+def _packed_indices(indices, size):
+    # indices into an index of the given size stored in the smallest
+    # suitable integer type
+    if not isinstance(indices, (np.ndarray, list, tuple, range)):
+        indices = np.fromiter(indices, dtype=np.int64)
+    return np.asarray(indices, dtype=np.int32 if size < 2**31 else np.int64)
+
+
 class MaskIndex(Index):
     def __init__(self, index, indices):
-        self.index = index
-        self.indices = list(indices)
+        # A mask of a mask is composed into a single mask of the
+        # underlying index, so access does not depend on the chain length
+        if isinstance(index, MaskIndex):
+            indices = index._indices[_packed_indices(indices, len(index))]
+            index = index._index
+
+        self._index = index
+        self._indices = _packed_indices(indices, len(index))
+        self._multi_positions = None
         # super().__init__(
-        #     *self.index._init_args,
-        #     order_by=self.index._init_order_by,
-        #     **self.index._init_kwargs,
+        #     *self._index._init_args,
+        #     order_by=self._index._init_order_by,
+        #     **self._index._init_kwargs,
         # )
 
     def _getitem(self, n):
-        n = self.indices[n]
-        return self.index[n]
+        if isinstance(self._index, MultiIndex):
+            if self._multi_positions is None:
+                self._multi_positions = self._index._positions(self._indices)
+            source, position = self._multi_positions
+            return self._index.indexes[source[n]][int(position[n])]
+
+        n = self._indices[n]
+        return self._index[int(n)]
 
     def __len__(self):
-        return len(self.indices)
+        return len(self._indices)
+
+    def _build_metadata_columns(self, keys):
+        # reuse the columns already built for the parent
+        parent = self._index.__dict__.get("_md_columns", {})
+        indexed = self._index._indexed_metadata_keys()
+        keys_from_parent = [k for k in keys if k in parent or k in indexed]
+        r = {
+            k: c.take(self._indices)
+            for k, c in self._index._metadata_columns(keys_from_parent).items()
+        }
+        missing = [k for k in keys if k not in r]
+        if missing:
+            r.update(super()._build_metadata_columns(missing))
+        return r
+
+    def _indexed_metadata_keys(self):
+        return self._index._indexed_metadata_keys()
 
     def __repr__(self):
-        return "MaskIndex(%r,%s)" % (self.index, self.indices)
+        return "MaskIndex(%r,%s)" % (self._index, self._indices.tolist())
 
 
 class MultiIndex(Index):
     def __init__(self, indexes, *args, **kwargs):
-        self.indexes = list(indexes)
+        self.indexes = list(self._flatten(indexes))
         super().__init__(*args, **kwargs)
         # self.indexes = list(i for i in indexes if len(i))
         # TODO: propagate  index._init_args, index._init_order_by, index._init_kwargs, for each i in indexes?
 
+    @property
+    def indexes(self):
+        return self._indexes
+
+    @indexes.setter
+    def indexes(self, indexes):
+        # the cumulative offsets are invalidated when the parts change
+        self._indexes = indexes
+        self._offsets = CumulativeLengths(indexes)
+        self._clear_metadata_cache()
+
     def sel(self, *args, **kwargs):
         if not args and not kwargs:
             return self
         return self.__class__(i.sel(*args, **kwargs) for i in self.indexes)
 
+    @staticmethod
+    def _flatten(indexes):
+        # nested multi indexes are replaced by their parts
+        for i in indexes:
+            if isinstance(i, MultiIndex):
+                yield from i.indexes
+            else:
+                yield i
+
     def _getitem(self, n):
-        k = 0
-        while n >= len(self.indexes[k]):
-            n -= len(self.indexes[k])
-            k += 1
+        k, n = self._offsets.locate(n)
         return self.indexes[k][n]
 
+    def __iter__(self):
+        # stream the parts instead of locating each element
+        return itertools.chain.from_iterable(self.indexes)
+
+    def _positions(self, indices):
+        r"""Return the part and the position within the part for each of ``indices``."""
+        offsets = np.asarray(self._offsets.all())
+        source = np.searchsorted(offsets, indices, side="right") - 1
+        position = indices - offsets[source]
+        return (
+            source.astype(np.int32),
+            position.astype(indices.dtype, copy=False),
+        )
+
     def __len__(self):
-        return sum(len(i) for i in self.indexes)
+        return len(self._offsets)
+
+    def _build_metadata_columns(self, keys):
+        columns = [i._metadata_columns(keys) for i in self.indexes]
+        return {k: MetadataColumn.concat([c[k] for c in columns]) for k in keys}
+
+    def _indexed_metadata_keys(self):
+        keys = [i._indexed_metadata_keys() for i in self.indexes]
+        if not keys:
+            return ()
+        return tuple(k for k in keys[0] if all(k in x for x in keys[1:]))
 
     def graph(self, depth=0):
         print(" " * depth, self.__class__.__name__)
@@ -42,6 +42,13 @@ class Remapping:
 
         return wrapped
 
+    def __contains__(self, name):
+        return name in self.remapping
+
+    def components(self, name):
+        """Return the keys the remapped ``name`` is built from"""
+        return self.remapping[name][1::2]
+
     def substitute(self, name, joiner, **kwargs):
         if name in self.remapping:
             lst = []
@@ -133,6 +133,8 @@ class Setting:
         return d.replace("{validator}", t)
 
     def validate(self, name, value):
+        if value is None and self.none_ok:
+            return
         if self.validator is not None and not self.validator.check(value):
             raise ValueError(
                 f"Settings {name} cannot be set to {value}. {self.validator.explain()}"
@@ -160,6 +162,98 @@ SETTINGS_AND_HELP = {
         5,
         """Number of threads used to download data.""",
     ),
+    "number-of-decode-threads": _(
+        1,
+        """Number of threads used to decode the field values when creating an ndarray
+        from a fieldlist (e.g. with ``to_numpy()``). {validator}""",
+        validator=IntervalValidator(Interval(1, 1024)),
+    ),
+    "number-of-message-scan-threads": _(
+        1,
+        """Number of threads used to find the messages in a large GRIB or BUFR file.
+        Each thread scans a byte range of at least 256 MB. {validator}""",
+        validator=IntervalValidator(Interval(1, 1024)),
+    ),
+    "message-reader-cache-size": _(
+        32,
+        """Maximum number of GRIB and BUFR files kept open to read the messages. When it
+        is reached the least recently used file is closed. At most half of the files
+        the process is allowed to open are used. {validator}""",
+        validator=IntervalValidator(Interval(1, 1000000)),
+    ),
+    "message-reader-mode": _(
+        "file",
+        """How the GRIB and BUFR messages are read from the files. With ``file`` ecCodes
+        reads them from a file object shared by all the threads, so the reads from the
+        same file are serialised. With ``pread`` each message is read with a positional
+        read, so the threads can read from the same file at the same time. With ``mmap``
+        the file is memory mapped once and only the bytes of each message are copied
+        from the mapping when its handle is created, which avoids a system call per
+        message when the file is on a fast local disk or in the page cache. In all the
+        modes ecCodes keeps its own copy of the message. With ``pread`` and ``mmap`` the
+        messages of a fieldlist are read in file order, with the adjacent ones read
+        together, when the values or the metadata of all the fields are extracted (e.g.
+        by ``to_numpy()``) and when the fieldlist is saved (e.g. by ``save()``).
+        {validator}""",
+        validator=ListValidator(["file", "pread", "mmap"]),
+    ),
+    "message-read-ahead-size": _(
+        None,
+        """Maximum number of bytes read at once ahead of the current field when
+        iterating through the fields of GRIB files (ex: 512K or 64M). The handles of
+        the fields are created from the bytes read, so it is also limited by
+        ``maximum-grib-handles-size``. When it is None or 0 each message is read on
+        its own when the field is used, as set by ``message-reader-mode``.""",
+        getter="_as_bytes",
+        none_ok=True,
+    ),
+    "use-message-read-ahead-thread": _(
+        False,
+        """Read the next block of messages in a background thread while the fields
+        of the current one are used when iterating through the fields of GRIB files.
+        See ``message-read-ahead-size``.""",
+    ),
+    "default-dtype": _(
+        None,
+        """Default data type of the arrays of values and coordinates returned by
+        the fields and fieldlists (e.g. by ``to_numpy()``, ``data()`` or ``to_latlon()``)
+        when no ``dtype`` is specified. When it is None the type used by the underlying
+        data accessor is used. For GRIB it is float64. {validator}""",
+        getter="_as_str",
+        none_ok=True,
+        validator=ListValidator(["float32", "float64"]),
+    ),
+    "use-grib-values-cache": _(
+        False,
+        """Keep the decoded values of the GRIB fields in a memory cache shared by
+        all the fields pointing to the same message in a file. The cached arrays
+        are read-only.""",
+    ),
+    "maximum-grib-values-cache-size": _(
+        "256M",
+        """Maximum memory used by the GRIB values cache (ex: 512M or 2G) when
+        ``use-grib-values-cache`` is True.""",
+        getter="_as_bytes",
+    ),
+    "maximum-grid-coordinates-cache-size": _(
+        "256M",
+        """Maximum memory used by the cache of the GRIB latitudes and longitudes
+        (ex: 512M or 2G). The coordinates are cached per grid, so they are only
+        computed once for the fields on the same grid. The cached arrays are
+        read-only. Set it to 0 to disable the cache.""",
+        getter="_as_bytes",
+    ),
+    "maximum-grib-handles-size": _(
+        None,
+        """Maximum total size of the messages of the GRIB fields read from files that
+        keep their ecCodes handle alive (ex: 512M or 2G). When it is exceeded the
+        handles of the least recently used fields are released and are created again
+        from the file when needed, losing the metadata values read from them. When it
+        is None the handles are kept as long as the fields exist. The live handles can
+        be inspected with ``earthkit.data.readers.grib.codes.grib_handles_info()``.""",
+        getter="_as_bytes",
+        none_ok=True,
+    ),
     "cache-policy": _(
         "user",
         """Caching policy. {validator}
@@ -168,7 +262,10 @@ SETTINGS_AND_HELP = {
     ),
     "use-message-position-index-cache": _(
         False,
-        "Stores message offset index for GRIB/BUFR files in the cache.",
+        """Stores message offset index for GRIB/BUFR files in the cache. For GRIB files
+        the values of the MARS keys used by ``sel()`` and ``order_by()``, the grid ids
+        (``md5GridSection``) and the validity date and time are also stored once they
+        are first needed.""",
     ),
     "maximum-cache-size": _(
         None,
@@ -590,6 +590,18 @@ class SqlDatabase(Database, VersionedDatabaseMixin):
                 dic = {k: v for k, v in dic.items() if v is not None}
             yield dic
 
+    def lookup_columns(self, *coords):
+        """
+        Return the values of each of the metadata attributes coords for all
+        the entries, in the same order as lookup_parts(), in a single query.
+        """
+        column_names = [entryname_to_dbname(c) for c in coords]
+        values = [[] for _ in coords]
+        for tupl in self._execute_select(column_names):
+            for lst, v in zip(values, tupl):
+                lst.append(v)
+        return {k: v for k, v in zip(coords, values)}
+
     def _execute_select(self, column_names, limit=None, offset=None):
         names_str = ",".join([x for x in column_names]) if column_names else "*"
         limit_str = f" LIMIT {limit}" if limit is not None else ""
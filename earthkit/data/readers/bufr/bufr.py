@@ -7,7 +7,6 @@
 # nor does it submit to any jurisdiction.
 #
 
-import os
 from abc import abstractmethod
 
 import eccodes
@@ -19,6 +18,7 @@ from earthkit.data.utils.message import (
     CodesHandle,
     CodesMessagePositionIndex,
     CodesReader,
+    read_uint,
 )
 from earthkit.data.utils.metadata import metadata_argument
 from earthkit.data.utils.parts import Part
@@ -45,39 +45,12 @@ BUFR_LS_KEYS = {
 
 
 class BufrCodesMessagePositionIndex(CodesMessagePositionIndex):
-    # This does not belong here, should be in the C library
-    def _get_message_positions(self, path):
-        fd = os.open(path, os.O_RDONLY)
-        try:
-
-            def get(count):
-                buf = os.read(fd, count)
-                assert len(buf) == count
-                return int.from_bytes(
-                    buf,
-                    byteorder="big",
-                    signed=False,
-                )
-
-            offset = 0
-            while True:
-                code = os.read(fd, 4)
-                if len(code) < 4:
-                    break
-
-                if code != b"BUFR":
-                    offset = os.lseek(fd, offset + 1, os.SEEK_SET)
-                    continue
+    MARKER = b"BUFR"
 
-                length = get(3)
-                edition = get(1)
-
-                if edition in [3, 4]:
-                    yield offset, length
-                    offset = os.lseek(fd, offset + length, os.SEEK_SET)
-
-        finally:
-            os.close(fd)
+    def _message_length(self, buf, offset):
+        if read_uint(buf, offset + 7, 1) in (3, 4):
+            return read_uint(buf, offset + 4, 3)
+        return None
 
 
 class BUFRCodesHandle(CodesHandle):
@@ -165,7 +138,9 @@ class BUFRMessage(Base):
         r""":class:`CodesHandle`: Gets an object providing access to the low level BUFR message structure."""
         if self._handle is None:
             assert self._offset is not None
-            self._handle = BUFRCodesReader.from_cache(self.path).at_offset(self._offset)
+            self._handle = BUFRCodesReader.from_cache(self.path).at_offset(
+                self._offset, self._length
+            )
         return self._handle
 
     def __repr__(self):
@@ -664,7 +639,11 @@ class BUFRInOneFile(BUFRInFiles):
         return self.__positions
 
     def part(self, n):
-        return Part(self.path, self._positions.offsets[n], self._positions.lengths[n])
+        return Part(
+            self.path,
+            int(self._positions.offsets[n]),
+            int(self._positions.lengths[n]),
+        )
 
     def number_of_parts(self):
         return len(self._positions)
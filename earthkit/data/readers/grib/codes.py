@@ -7,18 +7,21 @@
 # nor does it submit to any jurisdiction.
 #
 
+import hashlib
 import logging
-import os
 
 import eccodes
 import numpy as np
 
 from earthkit.data.core.fieldlist import Field
+from earthkit.data.core.settings import SETTINGS
 from earthkit.data.readers.grib.metadata import GribMetadata
+from earthkit.data.utils.lru import ArrayLRUCache, HandleLRUCache
 from earthkit.data.utils.message import (
     CodesHandle,
     CodesMessagePositionIndex,
     CodesReader,
+    read_uint,
 )
 
 LOG = logging.getLogger(__name__)
@@ -46,7 +49,7 @@ class GribCodesFloatArrayAccessor:
     def get(self, handle, dtype=None):
         v = eccodes.codes_get_array(handle, self.KEY)
         if dtype is not None:
-            return v.astype(dtype)
+            return v.astype(dtype, copy=False)
         else:
             return v
 
@@ -58,8 +61,13 @@ class GribCodesValueAccessor(GribCodesFloatArrayAccessor):
         super().__init__()
 
     def get(self, handle, dtype=None):
-        if dtype is np.float32 and self.HAS_FLOAT_SUPPORT:
-            return eccodes.codes_get_array(handle, self.KEY, ktype=dtype)
+        # float32 values are decoded directly without an intermediate float64 array
+        if (
+            dtype is not None
+            and self.HAS_FLOAT_SUPPORT
+            and np.dtype(dtype) == np.float32
+        ):
+            return eccodes.codes_get_array(handle, self.KEY, ktype=np.float32)
         else:
             return super().get(handle, dtype=dtype)
 
@@ -82,70 +90,224 @@ VALUE_ACCESSOR = GribCodesValueAccessor()
 LATITUDE_ACCESSOR = GribCodesLatitudeAccessor()
 LONGITUDE_ACCESSOR = GribCodesLongitudeAccessor()
 
+# decoded values shared by the fields, see the use-grib-values-cache setting
+VALUES_CACHE = ArrayLRUCache()
+# the fields read from files holding a live handle
+HANDLE_CACHE = HandleLRUCache()
 
-class GribCodesMessagePositionIndex(CodesMessagePositionIndex):
-    # This does not belong here, should be in the C library
-    def _get_message_positions(self, path):
-        fd = os.open(path, os.O_RDONLY)
-        try:
 
-            def get(count):
-                buf = os.read(fd, count)
-                assert len(buf) == count
-                return int.from_bytes(
-                    buf,
-                    byteorder="big",
-                    signed=False,
-                )
-
-            offset = 0
-            while True:
-                code = os.read(fd, 4)
-                if len(code) < 4:
-                    break
-
-                if code != b"GRIB":
-                    offset = os.lseek(fd, offset + 1, os.SEEK_SET)
-                    continue
-
-                length = get(3)
-                edition = get(1)
-
-                if edition == 1:
-                    if length & 0x800000:
-                        sec1len = get(3)
-                        os.lseek(fd, 4, os.SEEK_CUR)
-                        flags = get(1)
-                        os.lseek(fd, sec1len - 8, os.SEEK_CUR)
-
-                        if flags & (1 << 7):
-                            sec2len = get(3)
-                            os.lseek(fd, sec2len - 3, os.SEEK_CUR)
-
-                        if flags & (1 << 6):
-                            sec3len = get(3)
-                            os.lseek(fd, sec3len - 3, os.SEEK_CUR)
-
-                        sec4len = get(3)
-
-                        if sec4len < 120:
-                            length &= 0x7FFFFF
-                            length *= 120
-                            length -= sec4len
-                            length += 4
-
-                if edition == 2:
-                    length = get(8)
-
-                yield offset, length
-                offset = os.lseek(fd, offset + length, os.SEEK_SET)
+def grib_handles_info():
+    r"""Return statistics about the live ecCodes handles of the GRIB fields
+    read from files.
 
-        finally:
-            os.close(fd)
+    The handles are counted whatever the ``maximum-grib-handles-size``
+    :ref:`setting <settings>`, which limits their total size.
+
+    Returns
+    -------
+    dict
+        The number of live handles (``count``), the total ``size`` of their
+        messages in bytes and the number of handles released because of the
+        size limit (``releases``).
+    """
+    return HANDLE_CACHE.info()
+
+
+# The GRIB2 grid definition templates starting with "shapeOfTheEarth" (octet
+# 15 of the section), including HEALPix (3.150) and the ECMWF local templates
+_GRIB2_SHAPE_OF_THE_EARTH_TEMPLATES = {
+    0,
+    1,
+    2,
+    3,
+    4,
+    5,
+    10,
+    12,
+    20,
+    30,
+    31,
+    40,
+    41,
+    42,
+    43,
+    61,
+    62,
+    63,
+    90,
+    101,
+    110,
+    140,
+    150,
+    204,
+    1000,
+    1100,
+    1200,
+    32768,
+    32769,
+}
+
+# The GRIB2 grid definition templates without "shapeOfTheEarth", i.e. the
+# spectral ones. The grid id of the other templates is computed by ecCodes.
+_GRIB2_NO_SHAPE_OF_THE_EARTH_TEMPLATES = {50, 51, 52, 53}
+
+
+def _grib_grid_section(read):
+    # Return the bytes of the grid definition section of a GRIB message with
+    # "shapeOfTheEarth" set to 255 (missing) or None when it has no such
+    # section or the grid template is not known. read(pos, size) must return
+    # the bytes at pos relative to the start of the message.
+    header = read(0, 8)
+    if len(header) < 8 or header[:4] != b"GRIB":
+        return None
+
+    edition = header[7]
+    if edition == 1:
+        # the flags in section 1 tell if the optional GDS is present
+        sec1 = read(8, 8)
+        if len(sec1) < 8 or not sec1[7] & (1 << 7):
+            return None
+        pos = 8 + int.from_bytes(sec1[:3], byteorder="big")
+        length = int.from_bytes(read(pos, 3), byteorder="big")
+        # "shapeOfTheEarth" is not coded in the GRIB1 GDS (ecCodes derives it),
+        # so setting it does not change the section and nothing is masked
+        return bytearray(read(pos, length))
+
+    if edition == 2:
+        pos = 16
+        while True:
+            sec = read(pos, 5)
+            if len(sec) < 5 or sec[:4] == b"7777":
+                return None
+            length = int.from_bytes(sec[:4], byteorder="big")
+            number = sec[4]
+            if number == 3:
+                r = bytearray(read(pos, length))
+                template = int.from_bytes(r[12:14], byteorder="big")
+                if template in _GRIB2_SHAPE_OF_THE_EARTH_TEMPLATES and len(r) > 14:
+                    r[14] = 255
+                    return r
+                if template in _GRIB2_NO_SHAPE_OF_THE_EARTH_TEMPLATES:
+                    return r
+                return None
+            if number > 3 or length < 5:
+                return None
+            pos += length
+
+    return None
+
+
+def grib_grid_id(read):
+    r"""Compute the unique grid id of a GRIB message from its raw bytes.
+
+    The id is the md5 of the grid definition section with "shapeOfTheEarth"
+    set to 255 (missing) when the grid template has it, which is the same value
+    as the "md5GridSection" key of a handle with "shapeOfTheEarth" set to 255.
+    No handle is created.
+
+    Parameters
+    ----------
+    read: callable
+        ``read(pos, size)`` must return ``size`` bytes at position ``pos``
+        relative to the start of the message.
+
+    Returns
+    -------
+    str or None
+        The md5 hex digest, None when it cannot be computed from the bytes,
+        i.e. the message has no grid section or the grid template is not
+        known. The id then has to be computed from a handle (see
+        :meth:`GribCodesHandle.get_md5GridSection`).
+    """
+    sec = _grib_grid_section(read)
+    if sec is None:
+        return None
+    return hashlib.md5(sec).hexdigest()
+
+
+class GribCodesMessagePositionIndex(CodesMessagePositionIndex):
+    MARKER = b"GRIB"
+    # the keys used by sel() and order_by(), the grid id and the valid time
+    METADATA_KEYS = list(GribMetadata.INDEX_KEYS) + [
+        "md5GridSection",
+        "validityDate",
+        "validityTime",
+    ]
+    METADATA_VERSION = 4
+
+    def __init__(self, *args, **kwargs):
+        self._grid_ids = None
+        super().__init__(*args, **kwargs)
+
+    def grid_ids(self):
+        r"""Return the unique grid id of each message (see :func:`grib_grid_id`).
+
+        The ids are computed on first use by reading only the grid
+        section of the messages. A handle is only created for the
+        messages with a grid template not known by :func:`grib_grid_id`.
+        """
+        if self._grid_ids is None:
+            with open(self.path, "rb") as f:
+
+                def reader(offset):
+                    def read(pos, size):
+                        f.seek(offset + pos)
+                        return f.read(size)
+
+                    return read
+
+                self._grid_ids = [grib_grid_id(reader(x)) for x in self.offsets]
+
+            for i, x in enumerate(self._grid_ids):
+                if x is None:
+                    handle = GribCodesReader.from_cache(self.path).at_offset(
+                        int(self.offsets[i]), int(self.lengths[i])
+                    )
+                    self._grid_ids[i] = handle.get_md5GridSection()
+        return self._grid_ids
+
+    def _message_length(self, buf, offset):
+        length = read_uint(buf, offset + 4, 3)
+        edition = read_uint(buf, offset + 7, 1)
+        if edition not in (1, 2):
+            return None
+
+        if edition == 1:
+            if length & 0x800000:
+                # large GRIB1 message, the length is encoded with the
+                # help of the section 4 length
+                sec1len = read_uint(buf, offset + 8, 3)
+                flags = read_uint(buf, offset + 15, 1)
+                if sec1len is None or flags is None:
+                    return None
+                pos = offset + 8 + sec1len
+
+                for flag in (1 << 7, 1 << 6):
+                    if flags & flag:
+                        seclen = read_uint(buf, pos, 3)
+                        if seclen is None:
+                            return None
+                        pos += seclen
+
+                sec4len = read_uint(buf, pos, 3)
+                if sec4len is None:
+                    return None
+
+                if sec4len < 120:
+                    length &= 0x7FFFFF
+                    length *= 120
+                    length -= sec4len
+                    length += 4
+
+        if edition == 2:
+            length = read_uint(buf, offset + 8, 8)
+
+        return length
 
 
 class GribCodesHandle(CodesHandle):
     PRODUCT_ID = eccodes.CODES_PRODUCT_GRIB
+    _md5_grid_section = None
 
     # TODO: just a wrapper around the base class implementation to handle the
     # s,l,d qualifiers. Once these are implemented in the base class this method can
@@ -179,11 +341,62 @@ class GribCodesHandle(CodesHandle):
         # Obviously, the patch causes an inconsistency between the value of md5GridSection
         # read by this code, and the value read by another code without this patch.
 
-        save = eccodes.codes_get_long(self._handle, "shapeOfTheEarth")
+        # The md5 is computed from the raw bytes of the grid section with
+        # "shapeOfTheEarth" masked out, so the handle is not modified. It is
+        # computed once per handle, the handles without a file are only
+        # copied once.
+        if self._md5_grid_section is None:
+            result = None
+            if self.path is not None and self.offset is not None:
+                reader = GribCodesReader.from_cache(self.path)
+                try:
+                    result = grib_grid_id(
+                        lambda pos, size: reader.read(self.offset + pos, size)
+                    )
+                except EOFError:
+                    result = None
+            else:
+                buf = self.get_buffer()
+                result = grib_grid_id(lambda pos, size: buf[pos : pos + size])
+
+            if result is None:
+                result = self._masked_md5GridSection()
+            self._md5_grid_section = result
+        return self._md5_grid_section
+
+    def _masked_md5GridSection(self):
+        # the value computed by ecCodes with "shapeOfTheEarth" set to 255
+        try:
+            save = eccodes.codes_get_long(self._handle, "shapeOfTheEarth")
+        except eccodes.KeyValueNotFoundError:
+            return eccodes.codes_get_string(self._handle, "md5GridSection")
+
         eccodes.codes_set_long(self._handle, "shapeOfTheEarth", 255)
-        result = eccodes.codes_get_string(self._handle, "md5GridSection")
-        eccodes.codes_set_long(self._handle, "shapeOfTheEarth", save)
-        return result
+        try:
+            return eccodes.codes_get_string(self._handle, "md5GridSection")
+        finally:
+            eccodes.codes_set_long(self._handle, "shapeOfTheEarth", save)
+
+    # the keys set on a handle can change its grid
+    def set_multiple(self, values):
+        self._md5_grid_section = None
+        super().set_multiple(values)
+
+    def set_long(self, name, value):
+        self._md5_grid_section = None
+        super().set_long(name, value)
+
+    def set_double(self, name, value):
+        self._md5_grid_section = None
+        super().set_double(name, value)
+
+    def set_string(self, name, value):
+        self._md5_grid_section = None
+        super().set_string(name, value)
+
+    def set(self, name, value):
+        self._md5_grid_section = None
+        return super().set(name, value)
 
     def as_namespace(self, namespace, param="shortName"):
         r = {}
@@ -207,7 +420,8 @@ class GribCodesHandle(CodesHandle):
         eccodes.codes_set(self._handle, "missingValue", CodesHandle.MISSING_VALUE)
         vals = VALUE_ACCESSOR.get(self._handle, dtype=dtype)
         if self.get_long("bitmapPresent"):
-            vals[vals == CodesHandle.MISSING_VALUE] = np.nan
+            # compare in the type of the values so no float64 copy is made
+            vals[vals == vals.dtype.type(CodesHandle.MISSING_VALUE)] = np.nan
         return vals
 
     def get_latitudes(self, dtype=None):
@@ -259,13 +473,54 @@ class GribField(Field):
     @property
     def handle(self):
         r""":class:`CodesHandle`: Gets an object providing access to the low level GRIB message structure."""
-        if self._handle is None:
+        # the handle may be released by another thread at any time
+        handle = self._handle
+        if handle is None:
             assert self._offset is not None
-            self._handle = GribCodesReader.from_cache(self.path).at_offset(self._offset)
-        return self._handle
+            handle = GribCodesReader.from_cache(self.path).at_offset(
+                self._offset, self._length
+            )
+            self._set_handle(handle)
+        else:
+            HANDLE_CACHE.touch(self)
+        return handle
+
+    def _set_handle(self, handle):
+        # The live handles of the fields in files are always counted (see
+        # grib_handles_info()). They are released when the total size
+        # exceeds the limit, when set, and are created again from the file
+        # when needed.
+        self._handle = handle
+        if self.path is not None and self._offset is not None:
+            size = self._length
+            if size is None:
+                size = handle.get("totalLength", default=0)
+            HANDLE_CACHE.add(
+                self, size, SETTINGS.get("maximum-grib-handles-size")
+            )
+
+    def _release_handle(self):
+        # the metadata refers to the handle
+        self._handle = None
+        self._clear_metadata()
 
     def _values(self, dtype=None):
-        return self.handle.get_values(dtype=dtype)
+        if (
+            self.path is None
+            or self._offset is None
+            or not SETTINGS.get("use-grib-values-cache")
+        ):
+            return self.handle.get_values(dtype=dtype)
+
+        key = (self.path, self._offset, None if dtype is None else np.dtype(dtype).str)
+        v = VALUES_CACHE.get(key)
+        if v is None:
+            v = VALUES_CACHE.put(
+                key,
+                self.handle.get_values(dtype=dtype),
+                SETTINGS.get("maximum-grib-values-cache-size"),
+            )
+        return v
 
     # @property
     # def values(self):
@@ -0,0 +1,160 @@
+# (C) Copyright 2023 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+#
+
+import functools
+import logging
+
+import numpy as np
+
+LOG = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=16)
+def gaussian_latitudes(n):
+    r"""Return the latitudes of the Gaussian grid with ``n`` latitude lines
+    between a pole and the equator.
+
+    The latitudes are the arcsines of the roots of the Legendre polynomial
+    of degree 2n, computed with Newton iteration. The result is cached, so
+    it is read-only.
+
+    Returns
+    -------
+    ndarray
+        The 2n latitudes in degrees, from north to south.
+    """
+    nlat = 2 * n
+    # first guess of the roots in the northern hemisphere
+    k = np.arange(1, n + 1)
+    x = np.cos(np.pi * (k - 0.25) / (nlat + 0.5))
+    for _ in range(20):
+        p0 = np.ones_like(x)
+        p1 = x
+        for m in range(2, nlat + 1):
+            p0, p1 = p1, ((2 * m - 1) * x * p1 - (m - 1) * p0) / m
+        dx = p1 * (x * x - 1) / (nlat * (x * p1 - p0))
+        x = x - dx
+        if np.max(np.abs(dx)) < 1e-15:
+            break
+
+    lat = np.degrees(np.arcsin(x))
+    lat = np.concatenate([lat, -lat[::-1]])
+    lat.flags.writeable = False
+    return lat
+
+
+def _lons(lon1, lon2, n):
+    # like ecCodes, the first longitude is shifted when the area crosses
+    # the 0 meridian
+    if lon2 < lon1:
+        lon1 -= 360
+    return np.linspace(lon1, lon2, n)
+
+
+def _consistent(first, last, n, increment):
+    # the encoded increment must agree with the first and last points
+    return increment is None or abs(abs(last - first) - (n - 1) * increment) < 1e-5
+
+
+def _gaussian_rows(n, lat1, lat2, nj):
+    # the latitudes of the Gaussian grid from lat1 to lat2, which are located
+    # in the table by proximity since they are only encoded approximately
+    table = gaussian_latitudes(n)
+    j1 = int(np.argmin(np.abs(table - lat1)))
+    j2 = int(np.argmin(np.abs(table - lat2)))
+    if abs(j2 - j1) + 1 != nj:
+        return None
+    if j1 <= j2:
+        return table[j1 : j2 + 1]
+    return table[j2 : j1 + 1][::-1]
+
+
+def grid_coords(metadata):
+    r"""Generate the latitudes and longitudes of a GRIB field without ecCodes.
+
+    Only the regular_ll, regular_gg and global reduced_gg grids are supported
+    with the points scanned along the parallels from west to east.
+
+    Parameters
+    ----------
+    metadata: :obj:`GribMetadata`
+        The metadata of the field.
+
+    Returns
+    -------
+    tuple or None
+        The latitudes and longitudes as 1D float64 ndarrays. None when the grid
+        is not supported.
+    """
+    grid_type = metadata.get("gridType", None)
+    if grid_type not in ("regular_ll", "regular_gg", "reduced_gg"):
+        return None
+
+    if (
+        metadata.get("iScansNegatively", 0) != 0
+        or metadata.get("jPointsAreConsecutive", 0) != 0
+        or metadata.get("alternativeRowScanning", 0) != 0
+    ):
+        return None
+
+    lat1 = metadata.get("latitudeOfFirstGridPointInDegrees", None)
+    lat2 = metadata.get("latitudeOfLastGridPointInDegrees", None)
+    lon1 = metadata.get("longitudeOfFirstGridPointInDegrees", None)
+    lon2 = metadata.get("longitudeOfLastGridPointInDegrees", None)
+    nj = metadata.get("Nj", None)
+    size = metadata.get("numberOfDataPoints", None)
+    if None in (lat1, lat2, lon1, lon2, nj, size):
+        return None
+
+    if grid_type == "reduced_gg":
+        n = metadata.get("N", None)
+        pl = metadata.get("pl", None)
+        # only global grids: their rows are 360 degrees long
+        if (
+            n is None
+            or pl is None
+            or nj != 2 * n
+            or lon1 != 0
+            or np.sum(pl) != size
+        ):
+            return None
+
+        lats = _gaussian_rows(n, lat1, lat2, nj)
+        if lats is None:
+            return None
+
+        pl = np.asarray(pl, dtype=np.int64)
+        lat = np.repeat(lats, pl)
+        # position of each point within its row
+        starts = np.repeat(np.cumsum(pl) - pl, pl)
+        lon = (np.arange(size) - starts) * np.repeat(360.0 / pl, pl)
+        return lat, lon
+
+    ni = metadata.get("Ni", None)
+    if ni is None or ni < 2 or ni * nj != size or lon1 == lon2:
+        return None
+
+    if grid_type == "regular_ll":
+        lon_inc = metadata.get("iDirectionIncrementInDegrees", None)
+        lat_inc = metadata.get("jDirectionIncrementInDegrees", None)
+        if not _consistent(lon1, lon2 + (360 if lon2 < lon1 else 0), ni, lon_inc):
+            return None
+        if not _consistent(lat1, lat2, nj, lat_inc):
+            return None
+        lats = np.linspace(lat1, lat2, nj)
+    else:
+        n = metadata.get("N", None)
+        if n is None:
+            return None
+        lats = _gaussian_rows(n, lat1, lat2, nj)
+        if lats is None:
+            return None
+
+    lons = _lons(lon1, lon2, ni)
+    return np.repeat(lats, ni), np.tile(lons, nj)
@@ -12,24 +12,41 @@ import math
 import os
 from abc import abstractmethod
 
+from earthkit.data.core.columns import MetadataColumn
 from earthkit.data.core.fieldlist import FieldList
 from earthkit.data.core.index import Index, MaskIndex, MultiIndex
-from earthkit.data.decorators import alias_argument
+from earthkit.data.core.settings import SETTINGS
+from earthkit.data.decorators import alias_argument, cached_method
 from earthkit.data.indexing.database import (
     FILEPARTS_KEY_NAMES,
     MORE_KEY_NAMES,
     MORE_KEY_NAMES_WITH_UNDERSCORE,
     STATISTICS_KEY_NAMES,
 )
-from earthkit.data.readers.grib.codes import GribField
+from earthkit.data.readers.grib.codes import GribCodesReader, GribField, grib_grid_id
+from earthkit.data.readers.grib.metadata import GribMetadata
 from earthkit.data.readers.grib.pandas import PandasMixIn
 from earthkit.data.readers.grib.xarray import XarrayMixIn
 from earthkit.data.utils import progress_bar
 from earthkit.data.utils.availability import Availability
+from earthkit.data.utils.parts import COALESCE_MAX_SIZE, coalesce
 
 LOG = logging.getLogger(__name__)
 
 
+def _unread_part(field):
+    # the (path, offset, length) of the message of a field in a file
+    # without a handle
+    if (
+        isinstance(field, GribField)
+        and field._handle is None
+        and field.path is not None
+        and field._offset is not None
+        and field._length is not None
+    ):
+        return (field.path, field._offset, field._length)
+
+
 class GribFieldList(PandasMixIn, XarrayMixIn, FieldList):
     r"""Represents a list of :obj:`GribField <data.readers.grib.codes.GribField>`\ s.
 
@@ -171,6 +188,99 @@ class GribFieldList(PandasMixIn, XarrayMixIn, FieldList):
         expected_size = math.prod([len(v) for k, v in non_empty_coords.items()])
         return len(self) == expected_size
 
+    def _scheduled_fields(self, indices):
+        # When the messages are not read by ecCodes from the files (see the
+        # message-reader-mode setting) the messages of the fields stored in
+        # files are read in file order, with the adjacent ones read together,
+        # and the handles are created from the bytes in memory. The other
+        # fields come first.
+        if SETTINGS.get("message-reader-mode") == "file":
+            yield from super()._scheduled_fields(indices)
+            return
+
+        fields = []
+        ranges = []
+        for i in indices:
+            f = self[i]
+            part = _unread_part(f)
+            if part is None:
+                yield i, f
+            else:
+                fields.append((i, f))
+                ranges.append(part)
+
+        for path, offset, length, members in coalesce(ranges):
+            reader = GribCodesReader.from_cache(path)
+            buf = reader.read(offset, length)
+            for k in members:
+                i, f = fields[k]
+                # the handle may already be set when a field is repeated
+                if f._handle is None:
+                    pos = f._offset - offset
+                    f._set_handle(
+                        reader.from_message(buf[pos : pos + f._length], f._offset)
+                    )
+                # the handles are released as soon as the fields are used
+                fields[k] = None
+                yield i, f
+
+    def write(self, f):
+        r"""Write all the fields to a file object.
+
+        Parameters
+        ----------
+        f: file object
+            The target file object.
+        """
+        # When the messages are not read by ecCodes from the files (see the
+        # message-reader-mode setting) the messages stored in files are copied
+        # without creating handles. They are read in file order within windows
+        # of consecutive fields then written in the original order.
+        if SETTINGS.get("message-reader-mode") == "file":
+            super().write(f)
+            return
+
+        window = []
+        size = 0
+        for field in self:
+            window.append(field)
+            part = _unread_part(field)
+            if part is not None:
+                size += part[2]
+            if size >= COALESCE_MAX_SIZE:
+                self._write_window(f, window)
+                window = []
+                size = 0
+        self._write_window(f, window)
+
+    @staticmethod
+    def _write_window(f, fields):
+        parts = [_unread_part(field) for field in fields]
+        ranges = [p for p in parts if p is not None]
+        messages = [None] * len(ranges)
+        for path, offset, length, members in coalesce(ranges):
+            buf = GribCodesReader.from_cache(path).read(offset, length)
+            for k in members:
+                pos = ranges[k][1] - offset
+                messages[k] = memoryview(buf)[pos : pos + ranges[k][2]]
+
+        messages = iter(messages)
+        for field, part in zip(fields, parts):
+            if part is None:
+                field.write(f)
+            else:
+                f.write(next(messages))
+
+    @cached_method
+    def _is_shared_grid(self):
+        # the grid ids are taken from the metadata columns, which for fields
+        # in files are computed without creating any handles
+        if len(self) > 0:
+            grids = self._metadata_columns(["md5GridSection"])["md5GridSection"]
+            grids = grids.unique()
+            return len(grids) == 1 and grids[0] is not None
+        return False
+
     @alias_argument("levelist", ["level", "levellist"])
     @alias_argument("levtype", ["leveltype"])
     @alias_argument("param", ["variable", "parameter"])
@@ -205,6 +315,127 @@ class GribFieldListInFiles(GribFieldList):
     def __len__(self):
         return self.number_of_parts()
 
+    def __iter__(self):
+        # When enabled, the messages are read ahead in blocks of consecutive
+        # fields, so a linear scan does one large read per block instead of one
+        # small read per field. The next block can be read in a background
+        # thread while the fields of the current one are used.
+        size = SETTINGS.get("message-read-ahead-size")
+        # the handles of a block must not be released before they are used
+        max_handles_size = SETTINGS.get("maximum-grib-handles-size")
+        if size and max_handles_size is not None:
+            size = min(size, max_handles_size)
+        if not size:
+            return (self[i] for i in range(len(self)))
+        return self._read_ahead(size, SETTINGS.get("use-message-read-ahead-thread"))
+
+    def _read_ahead(self, size, background):
+        blocks = self._read_ahead_blocks(size)
+        if not background:
+            for block in blocks:
+                yield from self._read_block(block, size)
+            return
+
+        from earthkit.data.core.thread import SoftThreadPool
+
+        # at most one block is read while the fields of another one are used
+        with SoftThreadPool(nthreads=1) as pool:
+            future = None
+            for block in blocks:
+                current, future = future, pool.submit(self._read_block, block, size)
+                if current is not None:
+                    yield from current.result()
+            if future is not None:
+                yield from future.result()
+
+    def _read_ahead_blocks(self, size):
+        # the parts of the consecutive fields following each other in the
+        # same file within a span of at most size bytes (or a single larger part)
+        block = []
+        for i in range(len(self)):
+            part = self.part(i)
+            if block and (
+                part.path != block[0].path
+                or part.offset < block[-1].offset
+                or part.offset + part.length - block[0].offset > size
+            ):
+                yield block
+                block = []
+            block.append(part)
+        if block:
+            yield block
+
+    @staticmethod
+    def _read_block(block, size):
+        fields = [None] * len(block)
+        ranges = [(p.path, p.offset, p.length) for p in block]
+        for path, offset, length, members in coalesce(ranges, max_size=size):
+            reader = GribCodesReader.from_cache(path)
+            buf = reader.read(offset, length)
+            for k in members:
+                p = block[k]
+                f = GribField(p.path, p.offset, p.length)
+                pos = p.offset - offset
+                f._set_handle(reader.from_message(buf[pos : pos + p.length], p.offset))
+                fields[k] = f
+        return fields
+
+    def _default_index_keys(self):
+        # the keys are the same for all the fields, so no field is accessed
+        if len(self) > 0:
+            return GribMetadata.INDEX_KEYS
+        else:
+            return []
+
+    def _default_ls_keys(self):
+        if len(self) > 0:
+            return GribMetadata.LS_KEYS
+        else:
+            return []
+
+    def _describe_keys(self):
+        if len(self) > 0:
+            return GribMetadata.DESCRIBE_KEYS
+        else:
+            return []
+
+    def _indexed_metadata_keys(self):
+        return ("md5GridSection",)
+
+    def _build_metadata_columns(self, keys):
+        r = {}
+        if "md5GridSection" in keys:
+            r["md5GridSection"] = MetadataColumn.from_values(self._grid_ids())
+        missing = [k for k in keys if k not in r]
+        if missing:
+            r.update(super()._build_metadata_columns(missing))
+        return r
+
+    def _grid_ids(self):
+        # read the grid section of each message directly from the files
+        files = {}
+        try:
+            ids = []
+            for i in range(len(self)):
+                part = self.part(i)
+                f = files.get(part.path)
+                if f is None:
+                    f = files[part.path] = open(part.path, "rb")
+
+                def read(pos, size):
+                    f.seek(part.offset + pos)
+                    return f.read(size)
+
+                x = grib_grid_id(read)
+                if x is None:
+                    # the grid template is not known, ecCodes computes the id
+                    x = self[i].metadata("md5GridSection")
+                ids.append(x)
+            return ids
+        finally:
+            for f in files.values():
+                f.close()
+
     @abstractmethod
     def part(self, n):
         self._not_implemented()
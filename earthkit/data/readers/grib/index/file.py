@@ -39,7 +39,47 @@ class GribFieldListInOneFile(GribFieldListInFiles):
         return self.__positions
 
     def part(self, n):
-        return Part(self.path, self._positions.offsets[n], self._positions.lengths[n])
+        return Part(
+            self.path,
+            int(self._positions.offsets[n]),
+            int(self._positions.lengths[n]),
+        )
 
     def number_of_parts(self):
         return len(self._positions.offsets)
+
+    def _grid_ids(self):
+        stored = self._positions.metadata_columns()
+        if stored is not None and "md5GridSection" in stored:
+            c = stored["md5GridSection"]
+            return [c[i] for i in range(len(c))]
+        return self._positions.grid_ids()
+
+    def _indexed_metadata_keys(self):
+        keys = super()._indexed_metadata_keys()
+        stored = self._positions.metadata_columns()
+        if stored is not None:
+            keys += tuple(k for k in stored if k not in keys)
+        return keys
+
+    def _build_metadata_columns(self, keys):
+        # the columns of the most common keys are stored in the cache with
+        # the message positions when it is enabled, so they only have to be
+        # extracted from the fields once
+        stored = self._positions.metadata_columns() or {}
+        # the grid ids are computed without creating handles, so they alone
+        # do not trigger the extraction of the stored columns
+        indexed = super()._indexed_metadata_keys()
+        if not stored and any(
+            k in self._positions.METADATA_KEYS and k not in indexed for k in keys
+        ):
+            stored = (
+                self._positions.metadata_columns(super()._build_metadata_columns)
+                or {}
+            )
+
+        r = {k: stored[k] for k in keys if k in stored}
+        missing = [k for k in keys if k not in r]
+        if missing:
+            r.update(super()._build_metadata_columns(missing))
+        return r
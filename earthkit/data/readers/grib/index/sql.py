@@ -10,15 +10,19 @@
 import logging
 from collections import namedtuple
 
+from earthkit.data.core.columns import MetadataColumn
 from earthkit.data.core.constants import DATETIME
 from earthkit.data.core.order import build_remapping, normalize_order_by
 from earthkit.data.core.select import normalize_selection
 from earthkit.data.decorators import cached_method, normalize
+from earthkit.data.indexing.database import MORE_KEY_NAMES
 from earthkit.data.indexing.database.sql import (
     SqlDatabase,
     SqlOrder,
     SqlRemapping,
     SqlSelection,
+    dbname_to_entryname,
+    entryname_to_dbname,
 )
 from earthkit.data.readers.grib.index.db import FieldListInFilesWithDBIndex
 from earthkit.data.utils.serialise import register_serialisation
@@ -139,6 +143,35 @@ class FieldListInFilesWithSqlIndex(FieldListInFilesWithDBIndex):
     def number_of_parts(self):
         return self.db.count()
 
+    @cached_method
+    def _db_metadata_keys(self):
+        # the keys of the MARS namespace stored in the database have the same
+        # values as in the fields, the other columns are derived (e.g. the
+        # valid datetime) or stored under a different name
+        derived = [
+            entryname_to_dbname(k)
+            for k in MORE_KEY_NAMES + [DATETIME, "md5_grid_section"]
+        ]
+        return tuple(
+            dbname_to_entryname(k)
+            for k in self.db.dbkeys
+            if k.startswith("i_") and k not in derived
+        )
+
+    def _indexed_metadata_keys(self):
+        return super()._indexed_metadata_keys() + self._db_metadata_keys()
+
+    def _build_metadata_columns(self, keys):
+        r = {}
+        indexed = [k for k in keys if k in self._db_metadata_keys()]
+        if indexed:
+            for k, v in self.db.lookup_columns(*indexed).items():
+                r[k] = MetadataColumn.from_values(v)
+        missing = [k for k in keys if k not in r]
+        if missing:
+            r.update(super()._build_metadata_columns(missing))
+        return r
+
 
 register_serialisation(
     FieldListInFilesWithSqlIndex,
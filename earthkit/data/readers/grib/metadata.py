@@ -9,10 +9,15 @@
 
 import datetime
 
+import numpy as np
+
 from earthkit.data.core.geography import Geography
 from earthkit.data.core.metadata import Metadata
+from earthkit.data.core.settings import SETTINGS
 from earthkit.data.indexing.database import GRIB_KEYS_NAMES
+from earthkit.data.readers.grib.coords import grid_coords
 from earthkit.data.utils.bbox import BoundingBox
+from earthkit.data.utils.lru import ArrayLRUCache
 from earthkit.data.utils.projections import Projection
 
 
@@ -20,6 +25,10 @@ def missing_is_none(x):
     return None if x == 2147483647 else x
 
 
+# coordinates shared by the fields on the same grid
+COORDS_CACHE = ArrayLRUCache()
+
+
 class GribFieldGeography(Geography):
     def __init__(self, metadata):
         self.metadata = metadata
@@ -30,8 +39,9 @@ class GribFieldGeography(Geography):
         Returns
         -------
         ndarray
+            Read-only array when it is taken from the coordinates cache.
         """
-        return self.metadata._handle.get_latitudes(dtype=dtype)
+        return self._coords("latitudes", dtype)
 
     def longitudes(self, dtype=None):
         r"""Return the longitudes of the field.
@@ -39,8 +49,57 @@ class GribFieldGeography(Geography):
         Returns
         -------
         ndarray
+            Read-only array when it is taken from the coordinates cache.
         """
-        return self.metadata._handle.get_longitudes(dtype=dtype)
+        return self._coords("longitudes", dtype)
+
+    def _coords(self, name, dtype):
+        # the coordinates are cached per grid so fields on the same grid
+        # only compute them once
+        max_size = SETTINGS.get("maximum-grid-coordinates-cache-size")
+        if not max_size:
+            return self._compute_coords(name, dtype)[name]
+
+        try:
+            grid = self._unique_grid_id()
+        except Exception:
+            grid = None
+
+        if grid is None:
+            return self._compute_coords(name, dtype)[name]
+
+        # the md5 of the grid section does not include the shape of the earth,
+        # which matters for projected grids
+        def _key(name):
+            return (
+                grid,
+                self.metadata.get("shapeOfTheEarth", None),
+                name,
+                None if dtype is None else np.dtype(dtype).str,
+            )
+
+        v = COORDS_CACHE.get(_key(name))
+        if v is None:
+            coords = self._compute_coords(name, dtype)
+            for k, c in coords.items():
+                coords[k] = COORDS_CACHE.put(_key(k), c, max_size)
+            v = coords[name]
+        return v
+
+    def _compute_coords(self, name, dtype):
+        # the coordinates are generated without ecCodes when the grid is simple
+        # enough, in which case both the latitudes and longitudes are returned
+        r = grid_coords(self.metadata)
+        if r is not None:
+            return {
+                k: v if dtype is None else v.astype(dtype, copy=False)
+                for k, v in zip(("latitudes", "longitudes"), r)
+            }
+
+        handle = self.metadata._handle
+        if name == "latitudes":
+            return {name: handle.get_latitudes(dtype=dtype)}
+        return {name: handle.get_longitudes(dtype=dtype)}
 
     def x(self, dtype=None):
         r"""Return the x coordinates in the field's original CRS.
@@ -201,6 +260,10 @@ class GribMetadata(Metadata):
 
     __handle_type = None
 
+    # markers used by the memo of the key values
+    _NOT_READ = object()
+    _MISSING = object()
+
     def __init__(self, handle):
         if not isinstance(handle, self._handle_type()):
             raise TypeError(
@@ -208,6 +271,8 @@ class GribMetadata(Metadata):
             )
         self._handle = handle
         self._geo = None
+        # the values already read from the handle by (key, astype)
+        self._memo = {}
 
     @staticmethod
     def _handle_type():
@@ -246,19 +311,36 @@ class GribMetadata(Metadata):
         """
         return self._handle.items()
 
+    def _clear_memo(self):
+        r"""Drop the memoized key values. Must be called when the handle is
+        modified in place."""
+        self._memo.clear()
+
     def _get_internal_key(self, key, astype=None, default=None, raise_on_missing=False):
-        def _key_name(key):
-            if key == "param":
-                key = "shortName"
-            elif key == "_param_id":
-                key = "paramId"
-            return key
-
-        _kwargs = {}
-        if not raise_on_missing:
-            _kwargs["default"] = default
-
-        return self._handle.get(_key_name(key), ktype=astype, **_kwargs)
+        # The values are memoized, since override() works on a copy and only
+        # the writers modify the handle in place (see _clear_memo()). The
+        # arrays are not, since they can be large and are mutable.
+        v = self._memo.get((key, astype), self._NOT_READ)
+        if v is self._NOT_READ:
+            v = self._handle.get(
+                self._key_name(key), ktype=astype, default=self._MISSING
+            )
+            if not isinstance(v, np.ndarray):
+                self._memo[(key, astype)] = v
+
+        if v is self._MISSING:
+            if raise_on_missing:
+                raise KeyError(key)
+            return default
+        return v
+
+    @staticmethod
+    def _key_name(key):
+        if key == "param":
+            key = "shortName"
+        elif key == "_param_id":
+            key = "paramId"
+        return key
 
     def override(self, *args, **kwargs):
         r"""Change the metadata values and return a new object.
@@ -11,32 +11,142 @@ import logging
 
 LOG = logging.getLogger(__name__)
 
+DATA_COLUMNS = ("lat", "lon", "value")
+
+
+def _metadata_series(column, sizes):
+    # A column with one value per field is repeated for all the points of the
+    # field. The strings are stored as categoricals, so only the codes are
+    # repeated. The other values are repeated as a typed array.
+    import numpy as np
+    import pandas as pd
+
+    from earthkit.data.core.columns import values_to_array
+
+    values = column.values
+    if any(isinstance(v, str) for v in values) and all(
+        v is None or isinstance(v, str) for v in values
+    ):
+        codes = column.codes.astype(np.int64)
+        if None in values:
+            # the missing values have the code -1
+            remap = np.arange(len(values))
+            k = values.index(None)
+            remap[k] = -1
+            remap[k + 1 :] -= 1
+            codes = remap[codes]
+            values = [v for v in values if v is not None]
+        return pd.Categorical.from_codes(np.repeat(codes, sizes), categories=values)
+
+    return np.repeat(values_to_array(values)[column.codes], sizes)
+
 
 class PandasMixIn:
-    def to_pandas(self, latitude=None, longitude=None, **kwargs):
+    def to_pandas(self, latitude=None, longitude=None, columns=None, **kwargs):
+        r"""Convert the fieldlist into a Pandas DataFrame with one row per
+        grid point per field.
+
+        Parameters
+        ----------
+        latitude: number, None
+            When it is set together with ``longitude`` only the grid point at
+            this location is used.
+        longitude: number, None
+            See ``latitude``.
+        columns: list of str, None
+            The columns of the DataFrame. Any of "lat", "lon", "value", "datetime"
+            and the metadata keys of the "mars" namespace. The metadata keys not
+            listed are not extracted from the fields. When it is None all the
+            columns are generated.
+
+        Returns
+        -------
+        Pandas DataFrame
+            The columns are filled directly, without building an intermediate
+            DataFrame per field. The string metadata values are stored as
+            categoricals.
+        """
         import numpy as np
         import pandas as pd
 
-        def ident(x):
-            return x
+        from earthkit.data.core.columns import columns_from_rows
 
-        filter = ident
+        n = len(self)
+        if n == 0:
+            return pd.DataFrame()
 
-        def select_point(d):
-            idx = np.where((d["lat"] == latitude) & (d["lon"] == longitude))
-            return dict(lat=d["lat"][idx], lon=d["lon"][idx], value=d["value"][idx])
+        def select_point(lat, lon):
+            if latitude is None and longitude is None:
+                return None
+            return np.where((lat == latitude) & (lon == longitude))[0]
 
-        if latitude is not None or longitude is not None:
-            filter = select_point
+        data_columns = [c for c in DATA_COLUMNS if columns is None or c in columns]
+        keys = None
+        if columns is not None:
+            keys = [c for c in columns if c not in DATA_COLUMNS + ("datetime",)]
 
-        columns = ("lat", "lon", "value")
-        frames = []
-        for s in self:
-            df = pd.DataFrame.from_dict(
-                filter(dict(zip(columns, s.data(columns, flatten=True))))
+        # coordinates and values
+        if self._is_shared_grid():
+            # the coordinates are only computed once and the values are stored
+            # in a single array
+            lat, lon = self[0].data(("lat", "lon"), flatten=True)
+            idx = select_point(lat, lon)
+            if idx is not None:
+                lat, lon = lat[idx], lon[idx]
+            sizes = np.full(n, len(lat))
+
+            data = {}
+            if "lat" in data_columns:
+                data["lat"] = np.tile(lat, n)
+            if "lon" in data_columns:
+                data["lon"] = np.tile(lon, n)
+            if "value" in data_columns:
+                values = self.to_numpy(flatten=True)
+                if idx is not None:
+                    values = values[:, idx]
+                data["value"] = values.reshape(-1)
+            index = np.tile(np.arange(len(lat)), n)
+        else:
+            arrays = {c: [] for c in DATA_COLUMNS}
+            for f in self:
+                d = dict(zip(DATA_COLUMNS, f.data(DATA_COLUMNS, flatten=True)))
+                idx = select_point(d["lat"], d["lon"])
+                for c in DATA_COLUMNS:
+                    arrays[c].append(d[c] if idx is None else d[c][idx])
+            sizes = np.array([len(x) for x in arrays["lat"]])
+            data = {c: np.concatenate(arrays[c]) for c in data_columns}
+            index = np.concatenate([np.arange(s) for s in sizes])
+
+        # metadata, only extracted once per field
+        if columns is None or "datetime" in columns:
+            # the valid time is computed by the metadata of the first field
+            # of each distinct validityDate and validityTime
+            dt = self._metadata_columns(["validityDate", "validityTime"])
+            pairs = dt["validityDate"].codes.astype(np.int64) * len(
+                dt["validityTime"].values
+            ) + dt["validityTime"].codes.astype(np.int64)
+            _, first, inverse = np.unique(
+                pairs, return_index=True, return_inverse=True
             )
-            df["datetime"] = s.datetime()["valid_time"]
-            for k, v in s.metadata(namespace="mars").items():
-                df[k] = v
-            frames.append(df)
-        return pd.concat(frames)
+            valid_time = np.array(
+                [self[int(i)].datetime()["valid_time"] for i in first],
+                dtype="datetime64[ns]",
+            )
+            data["datetime"] = np.repeat(valid_time[inverse.reshape(-1)], sizes)
+
+        if keys is None:
+            # the keys of the namespace can differ between the fields
+            rows = [None] * n
+            self._fill_rows(lambda f: f.metadata(namespace="mars"), rows)
+            keys = list(dict.fromkeys(k for r in rows for k in r))
+            md = columns_from_rows(([r.get(k) for k in keys] for r in rows), keys)
+        else:
+            md = self._metadata_columns(keys)
+
+        for k in keys:
+            data[k] = _metadata_series(md[k], sizes)
+
+        if columns is not None:
+            data = {c: data[c] for c in columns}
+
+        return pd.DataFrame(data, index=index)
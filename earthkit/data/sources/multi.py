@@ -15,6 +15,7 @@ from earthkit.data.mergers import make_merger, merge_by_class
 from earthkit.data.sources.empty import EmptySource
 from earthkit.data.utils import tqdm
 from earthkit.data.utils.bbox import BoundingBox
+from earthkit.data.utils.offsets import CumulativeLengths
 
 from . import Source
 
@@ -32,7 +33,16 @@ class MultiSource(Source):
         self.sources = [s.mutate() for s in sources if not s.ignore()]
         self.filter = filter
         self.merger = merger
-        self._lengths = [None] * len(self.sources)
+
+    @property
+    def sources(self):
+        return self._sources
+
+    @sources.setter
+    def sources(self, sources):
+        # the cumulative offsets are invalidated when the sources change
+        self._sources = sources
+        self._offsets = CumulativeLengths(sources)
 
     def ignore(self):
         return len(self.sources) == 0
@@ -57,28 +67,17 @@ class MultiSource(Source):
             s._set_dataset(dataset)
 
     def __iter__(self):
-        return itertools.chain(*self.sources)
+        return itertools.chain.from_iterable(self.sources)
 
     def __getitem__(self, n):
-        if n < 0:
-            n = len(self) + n
-
-        i = 0
-        while n >= self._length(i):
-            n -= self._length(i)
-            i += 1
+        i, n = self._offsets.locate(n)
         return self.sources[i][n]
 
     def sel(self, *args, **kwargs):
         raise NotImplementedError
 
     def __len__(self):
-        return sum(self._length(i) for i, _ in enumerate(self.sources))
-
-    def _length(self, i):
-        if self._lengths[i] is None:
-            self._lengths[i] = len(self.sources[i])
-        return self._lengths[i]
+        return len(self._offsets)
 
     def __repr__(self) -> str:
         string = ",".join(repr(s) for s in self.sources)
@@ -0,0 +1,183 @@
+# (C) Copyright 2023 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+#
+
+import threading
+import weakref
+from collections import OrderedDict
+
+
+class ArrayLRUCache:
+    r"""Thread-safe in-memory LRU cache of ndarrays limited by the total
+    number of bytes of the stored arrays.
+
+    The arrays are made read-only when added to the cache, since they
+    are shared between all the users of the same key.
+    """
+
+    def __init__(self):
+        self._arrays = OrderedDict()
+        self._lock = threading.Lock()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        r"""Return the array stored for ``key`` or None when it is not in the cache."""
+        with self._lock:
+            v = self._arrays.get(key)
+            if v is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._arrays.move_to_end(key)
+            return v
+
+    def put(self, key, value, max_size):
+        r"""Add ``value`` to the cache, then evict the least recently used arrays
+        until the cache size is not larger than ``max_size`` bytes.
+
+        Returns
+        -------
+        ndarray
+            ``value`` made read-only.
+        """
+        value.flags.writeable = False
+        with self._lock:
+            old = self._arrays.pop(key, None)
+            if old is not None:
+                self._size -= old.nbytes
+            if value.nbytes <= max_size:
+                self._arrays[key] = value
+                self._size += value.nbytes
+            self._evict(max_size)
+        return value
+
+    def _evict(self, max_size):
+        while self._size > max_size:
+            _, v = self._arrays.popitem(last=False)
+            self._size -= v.nbytes
+            self.evictions += 1
+
+    def clear(self):
+        r"""Remove all the arrays and reset the counters."""
+        with self._lock:
+            self._arrays.clear()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def info(self):
+        r"""Return the cache statistics.
+
+        Returns
+        -------
+        dict
+            The number of ``hits``, ``misses`` and ``evictions``, the number of
+            stored arrays (``count``) and their total ``size`` in bytes.
+        """
+        with self._lock:
+            return dict(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                count=len(self._arrays),
+                size=self._size,
+            )
+
+    def __len__(self):
+        return len(self._arrays)
+
+
+class HandleLRUCache:
+    r"""Thread-safe LRU of the objects holding a live message handle, limited
+    by the total size of the messages.
+
+    The objects are only referenced weakly, so they are removed when they
+    are deleted. When the limit is exceeded the handles of the least
+    recently used objects are released by calling their ``_release_handle()``
+    method. They have to be able to create their handle again when needed.
+    """
+
+    def __init__(self):
+        self._owners = OrderedDict()
+        self._lock = threading.Lock()
+        self._size = 0
+        self.releases = 0
+
+    def add(self, owner, size, max_size=None):
+        r"""Add ``owner`` holding a handle of ``size`` bytes, then release the
+        handles of the least recently used objects until the total size is not
+        larger than ``max_size`` bytes. The handle of ``owner`` is kept even
+        when it is larger than ``max_size``. When ``max_size`` is None no
+        handle is released, the objects are only counted.
+        """
+        key = id(owner)
+
+        def _remove(ref):
+            with self._lock:
+                v = self._owners.get(key)
+                if v is not None and v[0] is ref:
+                    del self._owners[key]
+                    self._size -= v[1]
+
+        with self._lock:
+            old = self._owners.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            self._owners[key] = (weakref.ref(owner, _remove), size)
+            self._size += size
+            released = self._evict(max_size) if max_size is not None else []
+
+        # the handles are released outside the lock
+        for r in released:
+            r._release_handle()
+
+    def touch(self, owner):
+        r"""Mark the handle of ``owner`` as the most recently used."""
+        with self._lock:
+            if id(owner) in self._owners:
+                self._owners.move_to_end(id(owner))
+
+    def _evict(self, max_size):
+        released = []
+        while self._size > max_size and len(self._owners) > 1:
+            _, (ref, size) = self._owners.popitem(last=False)
+            self._size -= size
+            owner = ref()
+            if owner is not None:
+                released.append(owner)
+                self.releases += 1
+        return released
+
+    def clear(self):
+        r"""Forget all the objects and reset the counters. The handles are not
+        released."""
+        with self._lock:
+            self._owners.clear()
+            self._size = 0
+            self.releases = 0
+
+    def info(self):
+        r"""Return the cache statistics.
+
+        Returns
+        -------
+        dict
+            The number of released handles (``releases``), the number of live
+            handles (``count``) and the total ``size`` of their messages in bytes.
+        """
+        with self._lock:
+            return dict(
+                releases=self.releases, count=len(self._owners), size=self._size
+            )
+
+    def __len__(self):
+        return len(self._owners)
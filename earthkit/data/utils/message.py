@@ -9,14 +9,22 @@
 
 import json
 import logging
+import mmap
 import os
 import threading
 import time
+from collections import OrderedDict
 
 import eccodes
 import numpy as np
 
-from earthkit.data.core.caching import CACHE, auxiliary_cache_file
+from earthkit.data.core.caching import (
+    CACHE,
+    auxiliary_cache_file,
+    existing_auxiliary_cache_file,
+)
+from earthkit.data.core.columns import MetadataColumn
+from earthkit.data.core.settings import SETTINGS
 
 LOG = logging.getLogger(__name__)
 
@@ -31,79 +39,346 @@ except Exception:
     pass
 
 
+class FileBuffer:
+    r"""Read-only bytes-like access to a file with unbuffered reads.
+
+    Unlike a memory map, the reads release the GIL, so the file can be
+    accessed concurrently from multiple threads, each using its own object.
+    The file is searched in blocks and the last block is kept, so the
+    accesses following each other within a block do not read the file again.
+    """
+
+    BLOCK_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, path):
+        self._file = open(path, "rb", buffering=0)
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._block = b""
+        self._block_start = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self._file.close()
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, s):
+        start, stop, _ = s.indices(self._size)
+        return self._read(start, stop - start)
+
+    def _read(self, pos, count):
+        if count <= 0:
+            return b""
+        start = pos - self._block_start
+        if start >= 0 and start + count <= len(self._block):
+            return self._block[start : start + count]
+        self._file.seek(pos)
+        return self._file.read(count)
+
+    def _load_block(self, pos, count):
+        self._file.seek(pos)
+        self._block = self._file.read(count)
+        self._block_start = pos
+
+    def find(self, sub, start=0):
+        # the blocks overlap so that sub is found across their boundaries
+        pos = start
+        while pos + len(sub) <= self._size:
+            offset = pos - self._block_start
+            if offset < 0 or offset + len(sub) > len(self._block):
+                self._load_block(pos, self.BLOCK_SIZE + len(sub) - 1)
+                offset = 0
+
+            i = self._block.find(sub, offset)
+            if i >= 0:
+                return self._block_start + i
+            pos = max(pos + 1, self._block_start + len(self._block) - len(sub) + 1)
+        return -1
+
+
 class CodesMessagePositionIndex:
-    VERSION = 1
+    VERSION = 2
+    # the version of the JSON cache entries written previously
+    JSON_VERSION = 1
+    # the identifiers at the start and at the end of the messages
+    MARKER = None
+    END_MARKER = b"7777"
+    # the minimum number of bytes scanned by a thread when the file is split
+    MIN_SCAN_RANGE = 256 * 1024 * 1024
+    # the metadata keys stored in the cache next to the positions
+    METADATA_KEYS = []
+    METADATA_VERSION = 1
 
     def __init__(self, path):
         self.path = path
         self.offsets = None
         self.lengths = None
         self._cache_file = None
+        self._metadata = None
         self._load()
 
     def __len__(self):
         return len(self.offsets)
 
-    def _get_message_positions(self, path):
+    def _message_length(self, buf, offset):
+        r"""Return the length of the message starting with :attr:`MARKER` at
+        ``offset`` in ``buf`` or None when it is not a valid message.
+        """
         raise NotImplementedError
 
-    def _build(self):
+    def _is_message(self, buf, offset, length):
+        return (
+            length is not None
+            and len(self.MARKER) + len(self.END_MARKER) <= length
+            and offset + length <= len(buf)
+            and buf[offset + length - len(self.END_MARKER) : offset + length]
+            == self.END_MARKER
+        )
+
+    def _scan(self, buf, start, end):
+        # Find the messages from the first valid one at or after start until
+        # one starts at or after end. A message is only accepted when it ends
+        # with END_MARKER, otherwise the scan resumes after its start marker.
+        # Returns the offsets, the lengths and the offset where the scan stopped.
         offsets = []
         lengths = []
+        offset = buf.find(self.MARKER, start)
+        while 0 <= offset < end:
+            length = self._message_length(buf, offset)
+            if self._is_message(buf, offset, length):
+                offsets.append(offset)
+                lengths.append(length)
+                offset = buf.find(self.MARKER, offset + length)
+            else:
+                offset = buf.find(self.MARKER, offset + 1)
+
+        if offset < 0:
+            offset = len(buf)
+        return offsets, lengths, offset
+
+    def _scan_range(self, start, end):
+        with FileBuffer(self.path) as buf:
+            return self._scan(buf, start, end)
+
+    def _get_message_positions(self, path):
+        # The markers are located with find(), so only the headers of the
+        # messages are decoded in Python. A single thread scans the memory
+        # mapped file, multiple threads use their own unbuffered reads.
+        size = os.path.getsize(path)
+        if size == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+
+        nthreads = min(
+            SETTINGS.get("number-of-message-scan-threads"),
+            size // self.MIN_SCAN_RANGE,
+        )
+        if nthreads > 1:
+            offsets, lengths = self._parallel_scan(path, size, nthreads)
+        else:
+            with open(path, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                    offsets, lengths, _ = self._scan(buf, 0, size)
+
+        return np.array(offsets, dtype=np.int64), np.array(lengths, dtype=np.int64)
+
+    def _parallel_scan(self, path, size, nthreads):
+        # Each thread scans a byte range of the file, starting at the first
+        # valid message it finds. The results are then merged in order: the
+        # messages of a range are used from where the previous range stopped
+        # when the scan of the range went through the same offset. Otherwise
+        # (the range started in junk or with a false marker inside a message)
+        # the range is scanned again from that offset.
+        from earthkit.data.core.thread import SoftThreadPool
+
+        bounds = [(size * k) // nthreads for k in range(nthreads + 1)]
+        ranges = list(zip(bounds[:-1], bounds[1:]))
+        with SoftThreadPool(nthreads=nthreads) as pool:
+            futures = [pool.submit(self._scan_range, *r) for r in ranges]
+            results = [f.result() for f in futures]
 
-        for offset, length in self._get_message_positions(self.path):
-            offsets.append(offset)
-            lengths.append(length)
+        offsets = []
+        lengths = []
+        pos = 0
+        for (_, end), (r_offsets, r_lengths, r_stop) in zip(ranges, results):
+            if pos >= end:
+                # covered by a message of a previous range
+                continue
+
+            if pos in r_offsets:
+                i = r_offsets.index(pos)
+            elif pos == r_stop:
+                continue
+            else:
+                LOG.debug("Rescanning %s from %s", path, pos)
+                r_offsets, r_lengths, r_stop = self._scan_range(pos, end)
+                i = 0
+
+            offsets.extend(r_offsets[i:])
+            lengths.extend(r_lengths[i:])
+            pos = r_stop
+
+        return offsets, lengths
 
-        self.offsets = offsets
-        self.lengths = lengths
+    def _build(self):
+        self.offsets, self.lengths = self._get_message_positions(self.path)
 
     def _load(self):
         if CACHE.policy.use_message_position_index_cache():
             self._cache_file = auxiliary_cache_file(
                 "message-index",
                 self.path,
-                content="null",
-                extension=".json",
+                extension=".npy",
             )
-            if not self._load_cache():
+            if not self._load_cache() and not self._load_json_cache():
                 self._build()
                 self._save_cache()
         else:
             self._build()
 
     def _save_cache(self):
+        # The cache is a single int64 array: the version, the number of
+        # messages, then the offsets and the lengths
         if CACHE.policy.use_message_position_index_cache():
             try:
-                with open(self._cache_file, "w") as f:
-                    json.dump(
-                        dict(
-                            version=self.VERSION,
-                            offsets=self.offsets,
-                            lengths=self.lengths,
-                        ),
-                        f,
-                    )
+                n = len(self.offsets)
+                data = np.empty(2 + 2 * n, dtype=np.int64)
+                data[:2] = (self.VERSION, n)
+                data[2 : 2 + n] = self.offsets
+                data[2 + n :] = self.lengths
+                with open(self._cache_file, "wb") as f:
+                    np.save(f, data)
             except Exception:
                 LOG.exception("Write to cache failed %s", self._cache_file)
 
     def _load_cache(self):
         if CACHE.policy.use_message_position_index_cache():
             try:
-                with open(self._cache_file) as f:
-                    c = json.load(f)
-                    if not isinstance(c, dict):
-                        return False
-
-                    assert c["version"] == self.VERSION
-                    self.offsets = c["offsets"]
-                    self.lengths = c["lengths"]
-                    return True
+                if os.path.getsize(self._cache_file) == 0:
+                    return False
+
+                # the arrays are memory mapped, so only the accessed positions
+                # are read from disk
+                data = np.load(self._cache_file, mmap_mode="r")
+                assert data[0] == self.VERSION
+                n = int(data[1])
+                assert len(data) == 2 + 2 * n
+                self.offsets = data[2 : 2 + n]
+                self.lengths = data[2 + n :]
+                return True
             except Exception:
                 LOG.exception("Load from cache failed %s", self._cache_file)
 
         return False
 
+    def _load_json_cache(self):
+        # cache entry written by the previous versions
+        path = existing_auxiliary_cache_file(
+            "message-index", self.path, extension=".json"
+        )
+        if path is None:
+            return False
+
+        try:
+            with open(path) as f:
+                c = json.load(f)
+                if not isinstance(c, dict):
+                    return False
+
+                assert c["version"] == self.JSON_VERSION
+                self.offsets = np.array(c["offsets"], dtype=np.int64)
+                self.lengths = np.array(c["lengths"], dtype=np.int64)
+        except Exception:
+            LOG.exception("Load from cache failed %s", path)
+            return False
+
+        self._save_cache()
+        return True
+
+    def metadata_columns(self, build=None):
+        r"""Return the :obj:`MetadataColumn` of each of the :attr:`METADATA_KEYS`
+        stored in the cache.
+
+        Parameters
+        ----------
+        build: callable, None
+            When the columns are not stored yet, they are built with
+            ``build(keys)`` and stored. When it is None, the columns are
+            not built and no cache entry is created.
+
+        Returns
+        -------
+        dict or None
+            The columns, None when they are not available or the cache
+            is not used.
+        """
+        if self._metadata is None and self._cache_file is not None:
+            # no cache entry is created when the columns are only looked up
+            metadata_file = existing_auxiliary_cache_file(
+                "message-metadata",
+                self.path,
+                extension=".npz",
+            )
+            if metadata_file is not None:
+                self._metadata = self._load_metadata(metadata_file)
+            if self._metadata is None and build is not None and self.METADATA_KEYS:
+                self._metadata = build(self.METADATA_KEYS)
+                metadata_file = auxiliary_cache_file(
+                    "message-metadata",
+                    self.path,
+                    extension=".npz",
+                )
+                self._save_metadata(metadata_file, self._metadata)
+        return self._metadata
+
+    def _save_metadata(self, path, columns):
+        # Each column is stored as its codes and its values. The values are
+        # stored as JSON, so only the columns with scalar values are kept.
+        def _scalar(v):
+            return v is None or isinstance(v, (str, int, float))
+
+        keys = [k for k, c in columns.items() if all(_scalar(v) for v in c.values)]
+        if not keys:
+            return
+
+        try:
+            with open(path, "wb") as f:
+                np.savez(
+                    f,
+                    version=np.int64(self.METADATA_VERSION),
+                    codes=np.stack([columns[k].codes.astype(np.int32) for k in keys]),
+                    values=np.array(json.dumps({k: columns[k].values for k in keys})),
+                )
+        except Exception:
+            LOG.exception("Write to cache failed %s", path)
+
+    def _load_metadata(self, path):
+        try:
+            if os.path.getsize(path) == 0:
+                return None
+
+            with np.load(path) as f:
+                assert int(f["version"]) == self.METADATA_VERSION
+                codes = f["codes"]
+                values = json.loads(str(f["values"]))
+            assert codes.shape == (len(values), len(self))
+        except Exception:
+            LOG.exception("Load from cache failed %s", path)
+            return None
+
+        return {k: MetadataColumn(c, v) for c, (k, v) in zip(codes, values.items())}
+
+
+def read_uint(buf, pos, count):
+    r"""Return the big-endian unsigned integer of ``count`` bytes at ``pos``
+    in ``buf`` or None when ``buf`` is too short.
+    """
+    if pos + count > len(buf):
+        return None
+    return int.from_bytes(buf[pos : pos + count], byteorder="big", signed=False)
+
 
 class CodesHandle(eccodes.Message):
     MISSING_VALUE = np.finfo(np.float32).max
@@ -213,31 +488,114 @@ class CodesHandle(eccodes.Message):
                 return f.read(length)
 
 
-class ReaderLRUCache(dict):
-    def __init__(self, size):
-        self.readers = dict()
-        self.lock = threading.Lock()
-        self.size = size
+def _file_descriptor_budget():
+    # at most half of the files the process can open are used by the readers
+    try:
+        import resource
+
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft > 0 and soft != resource.RLIM_INFINITY:
+            return max(1, soft // 2)
+    except (ImportError, OSError, ValueError):
+        pass
+    return None
+
+
+class ReaderLRUCache:
+    r"""LRU cache of the readers with one reader per file and process.
+
+    The number of readers is limited by the ``message-reader-cache-size``
+    :ref:`setting <settings>` and by the number of file descriptors the
+    process can open. The readers are created outside the global lock,
+    with a lock per file, so a slow open does not block the other threads.
+    """
+
+    def __init__(self):
+        self._readers = OrderedDict()
+        self._lock = threading.Lock()
+        self._opening = {}
+        self.hits = 0
+        self.opens = 0
+        self.evictions = 0
 
     def __getitem__(self, path_and_cls):
-        path = path_and_cls[0]
-        cls = path_and_cls[1]
-        key = (path, os.getpid())
-        with self.lock:
+        path, cls = path_and_cls
+        key = (path, cls, os.getpid())
+        with self._lock:
+            reader = self._get(key)
+            if reader is not None:
+                return reader
+            opening = self._opening.setdefault(key, threading.Lock())
+
+        with opening:
             try:
-                return super().__getitem__(key)
-            except KeyError:
-                pass
-
-            c = self[key] = cls(path)
-            while len(self) >= self.size:
-                _, oldest = min((v.last, k) for k, v in self.items())
-                del self[oldest]
+                with self._lock:
+                    # another thread may have created it in the meantime
+                    reader = self._get(key)
+                    if reader is not None:
+                        return reader
+
+                reader = cls(path)
+
+                with self._lock:
+                    self._readers[key] = reader
+                    self.opens += 1
+                    self._evict()
+                return reader
+            finally:
+                # also when the reader cannot be created
+                with self._lock:
+                    if self._opening.get(key) is opening:
+                        del self._opening[key]
+
+    def _get(self, key):
+        reader = self._readers.get(key)
+        if reader is not None:
+            self._readers.move_to_end(key)
+            self.hits += 1
+        return reader
+
+    def _evict(self):
+        # The evicted readers are closed when no longer used by other threads
+        size = SETTINGS.get("message-reader-cache-size")
+        budget = _file_descriptor_budget()
+        if budget is not None:
+            size = min(size, budget)
+
+        while len(self._readers) > size:
+            self._readers.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        r"""Remove all the readers and reset the counters."""
+        with self._lock:
+            self._readers.clear()
+            self.hits = 0
+            self.opens = 0
+            self.evictions = 0
+
+    def info(self):
+        r"""Return the cache statistics.
+
+        Returns
+        -------
+        dict
+            The number of ``hits``, readers created (``opens``) and
+            ``evictions`` and the number of cached readers (``count``).
+        """
+        with self._lock:
+            return dict(
+                hits=self.hits,
+                opens=self.opens,
+                evictions=self.evictions,
+                count=len(self._readers),
+            )
 
-            return c
+    def __len__(self):
+        return len(self._readers)
 
 
-cache = ReaderLRUCache(32)  # TODO: Add to config
+cache = ReaderLRUCache()
 
 
 class CodesReader:
@@ -250,19 +608,32 @@ class CodesReader:
         # print("OPEN", self.path)
         self.file = open(self.path, "rb")
         self.last = time.time()
+        self._mmap = None
 
     def __del__(self):
         try:
             # print("CLOSE", self.path)
-            self.file.close()
+            if self._mmap is not None:
+                self._mmap.close()
         except Exception:
             pass
+        finally:
+            try:
+                self.file.close()
+            except Exception:
+                pass
 
     @classmethod
     def from_cache(cls, path):
         return cache[(path, cls)]
 
-    def at_offset(self, offset):
+    def at_offset(self, offset, length=None):
+        mode = SETTINGS.get("message-reader-mode")
+        if length is not None and mode != "file":
+            # the file position is not used, so no lock is needed
+            self.last = time.time()
+            return self.from_message(self.read(offset, length), offset)
+
         with self.lock:
             self.last = time.time()
             self.file.seek(offset, 0)
@@ -273,5 +644,88 @@ class CodesReader:
             assert handle is not None
             return self.HANDLE_TYPE(handle, self.path, offset)
 
+    def _mapping(self):
+        # The file is mapped once and the mapping is released with the
+        # reader, i.e. when it is evicted from the cache and no longer used
+        if self._mmap is None:
+            with self.lock:
+                if self._mmap is None:
+                    self._mmap = mmap.mmap(
+                        self.file.fileno(), 0, access=mmap.ACCESS_READ
+                    )
+        return self._mmap
+
+    def from_message(self, message, offset):
+        r"""Create a handle from the bytes of the message at ``offset`` in the file.
+
+        ``message`` can be any bytes-like object, e.g. a view returned by
+        :meth:`read`. It is copied by ecCodes, so it can be released afterwards.
+        """
+        if not isinstance(message, bytes):
+            # ecCodes only accepts bytes, so only the message is copied
+            message = bytes(message)
+        return self.HANDLE_TYPE(
+            eccodes.codes_new_from_message(message), self.path, offset
+        )
+
+    def read(self, offset, length):
+        r"""Return ``length`` bytes at ``offset`` without using the shared file
+        position when possible.
+
+        With the ``mmap`` ``message-reader-mode`` a memoryview of the memory
+        mapped file is returned, so nothing is copied, otherwise the bytes are
+        read with a positional read. The result can be sliced and passed to
+        :meth:`from_message`.
+        A read can return fewer bytes than requested (e.g. on network file
+        systems or when interrupted), so it is repeated until ``length`` bytes
+        are read.
+
+        Raises
+        ------
+        EOFError
+            When the file ends before ``length`` bytes are read.
+        """
+        if SETTINGS.get("message-reader-mode") == "mmap":
+            data = memoryview(self._mapping())[offset : offset + length]
+            self._check_read(offset, length, len(data))
+            return data
+
+        if hasattr(os, "pread"):
+            fd = self.file.fileno()
+            data = os.pread(fd, length, offset)
+            if len(data) == length:
+                return data
+            parts = [data]
+            size = len(data)
+            while size < length:
+                chunk = os.pread(fd, length - size, offset + size)
+                if not chunk:
+                    break
+                parts.append(chunk)
+                size += len(chunk)
+            self._check_read(offset, length, size)
+            return b"".join(parts)
+
+        # positional reads are not available on all the platforms
+        with self.lock:
+            self.file.seek(offset, 0)
+            parts = []
+            size = 0
+            while size < length:
+                chunk = self.file.read(length - size)
+                if not chunk:
+                    break
+                parts.append(chunk)
+                size += len(chunk)
+        self._check_read(offset, length, size)
+        return b"".join(parts)
+
+    def _check_read(self, offset, length, size):
+        if size != length:
+            raise EOFError(
+                f"{self.path}: expected {length} bytes at offset {offset}, "
+                f"only {size} could be read"
+            )
+
     def __repr__(self):
         return f"{self.__class__.__name__}({self.path}"
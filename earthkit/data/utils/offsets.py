@@ -0,0 +1,68 @@
+# (C) Copyright 2023 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+#
+
+import bisect
+
+
+class CumulativeLengths:
+    r"""Cumulative offsets of a sequence of sized parts, used to locate the part
+    an element belongs to with bisection.
+
+    The lengths are only queried when an element beyond the already
+    known offsets is requested, so parts are not opened unnecessarily.
+
+    Parameters
+    ----------
+    parts: list
+        The parts. Must not be modified after the object is created.
+    """
+
+    def __init__(self, parts):
+        self.parts = parts
+        self.offsets = [0]
+
+    def _extend(self, n=None):
+        # compute the offsets until the part containing element n or
+        # until the end when n is None
+        while len(self.offsets) <= len(self.parts) and (
+            n is None or self.offsets[-1] <= n
+        ):
+            self.offsets.append(
+                self.offsets[-1] + len(self.parts[len(self.offsets) - 1])
+            )
+
+    def __len__(self):
+        r"""Return the total number of elements."""
+        self._extend()
+        return self.offsets[-1]
+
+    def all(self):
+        r"""Return the list of all the offsets, including the total length as the last item."""
+        self._extend()
+        return self.offsets
+
+    def locate(self, n):
+        r"""Return the part index and the position within that part of element ``n``.
+
+        Raises
+        ------
+        IndexError
+            When ``n`` is out of range.
+        """
+        if n < 0:
+            n += len(self)
+            if n < 0:
+                raise IndexError("index out of range")
+        else:
+            self._extend(n)
+            if n >= self.offsets[-1]:
+                raise IndexError("index out of range")
+
+        k = bisect.bisect_right(self.offsets, n) - 1
+        return k, n - self.offsets[k]
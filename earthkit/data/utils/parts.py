@@ -56,3 +56,52 @@ class Part:
 
     def __repr__(self):
         return f"Part[{self.path},{self.offset},{self.length}]"
+
+
+# near-adjacent byte ranges are read together when the gap between them
+# is not larger than this
+COALESCE_MAX_GAP = 256 * 1024
+# the maximum size of a single read
+COALESCE_MAX_SIZE = 64 * 1024 * 1024
+
+
+def coalesce(ranges, max_gap=COALESCE_MAX_GAP, max_size=COALESCE_MAX_SIZE):
+    r"""Group byte ranges of files into larger sequential reads.
+
+    The ranges are sorted by path and offset, then the adjacent or
+    near-adjacent ones are merged as long as the merged range is not larger
+    than ``max_size``. A range larger than ``max_size`` is read on its own.
+
+    Parameters
+    ----------
+    ranges: list
+        The ``(path, offset, length)`` of each range.
+    max_gap: int
+        The maximum number of unused bytes read between two ranges.
+    max_size: int
+        The maximum size of a merged range.
+
+    Returns
+    -------
+    list
+        One ``(path, offset, length, members)`` tuple per read in file order,
+        where ``members`` are the positions in ``ranges`` of the ranges
+        contained in the read, sorted by offset.
+    """
+    order = sorted(range(len(ranges)), key=lambda i: (ranges[i][0], ranges[i][1]))
+    blocks = []
+    for i in order:
+        path, offset, length = ranges[i]
+        if blocks:
+            b_path, b_offset, b_length, members = blocks[-1]
+            end = max(b_offset + b_length, offset + length)
+            if (
+                b_path == path
+                and offset - (b_offset + b_length) <= max_gap
+                and end - b_offset <= max_size
+            ):
+                blocks[-1] = (b_path, b_offset, end - b_offset, members)
+                members.append(i)
+                continue
+        blocks.append((path, offset, length, [i]))
+    return blocks
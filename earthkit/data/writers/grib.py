@@ -25,6 +25,8 @@ class GribWriter(Writer):
                 handle.set_long("bitmapPresent", 1)
 
         handle.set_values(values)
+        # the values of the keys depending on the data may have changed
+        metadata._clear_memo()
         handle.write(f)
 
 
@@ -8,7 +8,9 @@
 # granted to it by virtue of its status as an intergovernmental organisation
 # nor does it submit to any jurisdiction.
 
-from earthkit.data import from_source
+import pytest
+
+from earthkit.data import from_source, settings
 from earthkit.data.testing import earthkit_examples_file, earthkit_remote_test_data_file
 
 
@@ -25,6 +27,14 @@ def test_bufr_message_repr():
     assert "BUFRMessage" in ds[0].__repr__()
 
 
+@pytest.mark.parametrize("mode", ["file", "pread", "mmap"])
+def test_bufr_reader_mode(mode):
+    with settings.temporary({"message-reader-mode": mode}):
+        ds = from_source("file", earthkit_examples_file("temp_10.bufr"))
+        assert ds.metadata("dataCategory") == [2] * 10
+        assert ds[3].handle.offset == ds._positions.offsets[3]
+
+
 def test_bufr_metadata():
     ds = from_source("file", earthkit_examples_file("temp_10.bufr"))
     assert ds[0].subset_count() == 1
@@ -9,15 +9,18 @@
 # nor does it submit to any jurisdiction.
 #
 
+import logging
 import os
 
 import pytest
 
 from earthkit.data import cache, from_source, settings
-from earthkit.data.core.caching import cache_file
+from earthkit.data.core.caching import cache_file, existing_auxiliary_cache_file
 from earthkit.data.core.temporary import temp_directory
 from earthkit.data.testing import earthkit_examples_file
 
+LOG = logging.getLogger(__name__)
+
 
 def check_cache_files(dir_path):
     def touch(target, args):
@@ -174,6 +177,215 @@ def test_grib_offset_index_cache(index_cache):
         assert f.metadata("param") == "t", f"index-cache={index_cache}"
 
 
+def _copy_to_temp(path, target):
+    with open(path, "rb") as f, open(target, "wb") as g:
+        g.write(f.read())
+    return target
+
+
+def test_grib_offset_index_cache_binary():
+    import numpy as np
+
+    from earthkit.data.readers.grib.codes import GribCodesMessagePositionIndex
+
+    s = {"cache-policy": "temporary", "use-message-position-index-cache": True}
+    with settings.temporary(s), temp_directory() as tmp:
+        path = _copy_to_temp(
+            earthkit_examples_file("tuv_pl.grib"), os.path.join(tmp, "a.grib")
+        )
+        ref = GribCodesMessagePositionIndex(path)
+        assert ref._cache_file.endswith(".npy")
+
+        # the second index is memory mapped from the cache
+        r = GribCodesMessagePositionIndex(path)
+        assert isinstance(r.offsets.base, np.memmap)
+        assert r.offsets.tolist() == ref.offsets.tolist()
+        assert r.lengths.tolist() == ref.lengths.tolist()
+
+        ds = from_source("file", path)
+        assert ds[3].metadata("param") == "t"
+
+
+def test_grib_offset_index_cache_json():
+    import json
+
+    from earthkit.data.core.caching import auxiliary_cache_file
+    from earthkit.data.readers.grib.codes import GribCodesMessagePositionIndex
+
+    s = {"cache-policy": "temporary", "use-message-position-index-cache": True}
+    with settings.temporary(s), temp_directory() as tmp:
+        path = _copy_to_temp(
+            earthkit_examples_file("test.grib"), os.path.join(tmp, "a.grib")
+        )
+
+        # cache entry in the JSON format, the values are not the real ones
+        # to check that it is used
+        auxiliary_cache_file(
+            "message-index",
+            path,
+            content=json.dumps(dict(version=1, offsets=[0, 5], lengths=[5, 7])),
+            extension=".json",
+        )
+
+        r = GribCodesMessagePositionIndex(path)
+        assert r.offsets.tolist() == [0, 5]
+        assert r.lengths.tolist() == [5, 7]
+
+        # converted to the binary format
+        with open(r._cache_file, "rb") as f:
+            assert f.read(6) == b"\x93NUMPY"
+        r = GribCodesMessagePositionIndex(path)
+        assert r.offsets.tolist() == [0, 5]
+
+
+def test_grib_metadata_cache(monkeypatch):
+    from earthkit.data.utils.message import CodesReader
+
+    s = {"cache-policy": "temporary", "use-message-position-index-cache": True}
+    with settings.temporary(s), temp_directory() as tmp:
+        path = _copy_to_temp(
+            earthkit_examples_file("tuv_pl.grib"), os.path.join(tmp, "a.grib")
+        )
+
+        ds = from_source("file", path)
+        ref_sel = ds.sel(param="t", level=[500, 850]).metadata(["param", "level"])
+        ref_order = ds.order_by(level="ascending", param="descending")._indices
+        ref_indices = ds.indices()
+
+        # the metadata is read from the cache when the file is opened again
+        def _no_handle(self, offset):
+            raise AssertionError("handle created")
+
+        monkeypatch.setattr(CodesReader, "at_offset", _no_handle)
+
+        ds = from_source("file", path)
+        r = ds.sel(param="t", level=[500, 850])
+        assert len(r) == len(ref_sel)
+        r = ds.order_by(level="ascending", param="descending")
+        assert r._indices.tolist() == ref_order.tolist()
+        assert ds.indices() == ref_indices
+        assert ds._is_shared_grid()
+
+        c = ds._metadata_columns(["date"])["date"]
+        assert c.unique() == [20180801]
+        c = ds._metadata_columns(["validityDate"])["validityDate"]
+        assert c.unique() == [20180801]
+
+        monkeypatch.undo()
+        assert ds._positions.metadata_columns()["md5GridSection"].unique() == [
+            ds[0].metadata("md5GridSection")
+        ]
+        assert r.metadata(["param", "level"])[:2] == [["v", 300], ["u", 300]]
+
+        # invalidated when the file changes
+        with open(path, "ab") as f:
+            f.write(bytes(10))
+        ds = from_source("file", path)
+        assert ds._positions.metadata_columns() is None
+        # no cache entry is created when the columns are only looked up
+        assert (
+            existing_auxiliary_cache_file("message-metadata", path, extension=".npz")
+            is None
+        )
+
+
+def test_grib_summary_from_metadata_cache(monkeypatch):
+    from earthkit.data.utils.message import CodesReader
+
+    s = {"cache-policy": "temporary", "use-message-position-index-cache": True}
+    with settings.temporary(s), temp_directory() as tmp:
+        path = _copy_to_temp(
+            earthkit_examples_file("tuv_pl.grib"), os.path.join(tmp, "a.grib")
+        )
+
+        ds = from_source("file", path)
+        ref_ls = ds.ls()
+        ref_head = ds.head(2)
+        ref_tail = ds.tail(2, extra_keys=["date"])
+        ref_describe = ds.describe().data
+        ref_describe_t = ds.describe("t").data
+
+        # the keys stored in the cache are not read from the fields when the
+        # file is opened again
+        def _no_handle(self, *args):
+            raise AssertionError("message read")
+
+        monkeypatch.setattr(CodesReader, "at_offset", _no_handle)
+        monkeypatch.setattr(CodesReader, "read", _no_handle)
+
+        ds = from_source("file", path)
+        r = ds.head(2, keys=["param", "levelist", "date"])
+        assert r["param"].tolist() == ref_head["shortName"].tolist()
+        assert ds.sel(param="u").head(2, keys=["param"])["param"].tolist() == [
+            "u",
+            "u",
+        ]
+
+        # the other keys are read from the fields
+        monkeypatch.undo()
+        assert ds.ls().equals(ref_ls)
+        assert ds.head(2).equals(ref_head)
+        assert ds.tail(2, extra_keys=["date"]).equals(ref_tail)
+        assert ds.describe().data.equals(ref_describe)
+        assert ds.describe("t").data.equals(ref_describe_t)
+        r = ds.head(2, extra_keys=["bitsPerValue"])
+        assert r["bitsPerValue"].tolist() == [4, 4]
+
+
+@pytest.mark.long_test
+def test_grib_offset_index_cache_benchmark():
+    import json
+    import time
+
+    import numpy as np
+
+    from earthkit.data.core.caching import auxiliary_cache_file
+    from earthkit.data.utils.message import CodesMessagePositionIndex
+
+    n = 2_000_000
+
+    class _Index(CodesMessagePositionIndex):
+        def _get_message_positions(self, path):
+            return np.arange(n, dtype=np.int64) * 1000, np.full(n, 1000, np.int64)
+
+    s = {"cache-policy": "temporary", "use-message-position-index-cache": True}
+    with settings.temporary(s), temp_directory() as tmp:
+        json_path = os.path.join(tmp, "a.grib")
+        binary_path = os.path.join(tmp, "b.grib")
+        for p in (json_path, binary_path):
+            with open(p, "wb"):
+                pass
+
+        auxiliary_cache_file(
+            "message-index",
+            json_path,
+            content=json.dumps(
+                dict(
+                    version=1,
+                    offsets=list(range(0, n * 1000, 1000)),
+                    lengths=[1000] * n,
+                )
+            ),
+            extension=".json",
+        )
+        _Index(binary_path)
+
+        # the JSON entry is converted on first use
+        start = time.time()
+        _Index(json_path)
+        json_time = time.time() - start
+
+        start = time.time()
+        r = _Index(binary_path)
+        binary_time = time.time() - start
+
+        assert len(r) == n
+        LOG.info(
+            "open times for %s messages: json=%ss binary=%ss", n, json_time, binary_time
+        )
+        assert binary_time < json_time
+
+
 # See github #155. This test can hang so we must set a timeout.
 @pytest.mark.no_cache_init
 @pytest.mark.timeout(20)
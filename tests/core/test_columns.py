@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+# (C) Copyright 2020 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+#
+
+import functools
+
+import numpy as np
+import pytest
+
+from earthkit.data import from_source
+from earthkit.data.core.columns import MetadataColumn
+from earthkit.data.core.index import Order, Selection
+from earthkit.data.core.order import build_remapping
+from earthkit.data.testing import earthkit_examples_file
+
+
+def test_metadata_column_from_values():
+    c = MetadataColumn.from_values(["t", "u", "t", None, 1, 1.0])
+    assert len(c) == 6
+    assert c.values == ["t", "u", None, 1, 1.0]
+    assert c.codes.tolist() == [0, 1, 0, 2, 3, 4]
+    assert [c[i] for i in range(len(c))] == ["t", "u", "t", None, 1, 1.0]
+    assert c.unique() == ["t", "u", None, 1, 1.0]
+
+    with pytest.raises(TypeError):
+        MetadataColumn.from_values([[1, 2]])
+
+
+def test_metadata_column_take_concat():
+    c1 = MetadataColumn.from_values(["t", "u", "v", "t"])
+    c2 = MetadataColumn.from_values(["v", "q"])
+
+    r = c1.take([3, 2])
+    assert [r[i] for i in range(len(r))] == ["t", "v"]
+    assert r.unique() == ["t", "v"]
+
+    r = MetadataColumn.concat([c1, c2])
+    assert [r[i] for i in range(len(r))] == ["t", "u", "v", "t", "v", "q"]
+    assert r.values == ["t", "u", "v", "q"]
+
+    r = MetadataColumn.concat([])
+    assert len(r) == 0
+
+
+def test_metadata_column_mask():
+    c = MetadataColumn.from_values([1000, 850, 500, 850, None])
+    assert c.mask(lambda x: x == 850).tolist() == [False, True, False, True, False]
+
+    s = Selection(dict(level=[850, 500]))
+    assert c.mask(s.actions["level"]).tolist() == [False, True, True, True, False]
+
+
+def test_metadata_column_rank():
+    c = MetadataColumn.from_values([850, 1000, 500, 850])
+    assert c.rank(lambda a, b: (a > b) - (a < b)).tolist() == [1, 2, 0, 1]
+    assert c.rank(lambda a, b: (a < b) - (a > b)).tolist() == [1, 0, 2, 1]
+    assert c.take([2, 3]).rank(lambda a, b: (a > b) - (a < b)).tolist() == [0, 1]
+
+
+@pytest.mark.parametrize(
+    "params,remapping",
+    [
+        (dict(param="descending", level="ascending"), None),
+        (dict(level="descending"), None),
+        (dict(param=["u", "t", "v"]), None),
+        (dict(level=lambda a, b: (a % 300 > b % 300) - (a % 300 < b % 300)), None),
+        (
+            dict(param_level=["t850", "t1000", "u1000", "v850", "v1000", "u850"]),
+            {"param_level": "{param}{levelist}"},
+        ),
+    ],
+)
+def test_order_by_with_metadata_columns(params, remapping):
+    ds = from_source("file", earthkit_examples_file("test6.grib"))
+
+    order = Order(params, remapping=build_remapping(remapping))
+    ref = sorted(
+        range(len(ds)),
+        key=functools.cmp_to_key(lambda i, j: order.compare_elements(ds[i], ds[j])),
+    )
+    r = ds.order_by(params, remapping=remapping)
+    assert r._indices.tolist() == ref
+
+
+@pytest.mark.parametrize(
+    "params,remapping",
+    [
+        (dict(param="t"), None),
+        (dict(param=["u", "v"], level=slice(400, 700)), None),
+        (dict(param_level=["t850", "u1000"]), {"param_level": "{param}{levelist}"}),
+        (dict(param=lambda x: x != "t", level=500), None),
+    ],
+)
+def test_sel_with_metadata_columns(params, remapping):
+    ds = from_source("file", earthkit_examples_file("tuv_pl.grib"))
+
+    ref = [
+        i
+        for i, f in enumerate(ds)
+        if Selection(params, remapping=remapping).match_element(f)
+    ]
+    r = ds.sel(params, remapping=remapping)
+    assert r._indices.tolist() == ref
+
+    # the columns are cached and reused by the derived objects
+    assert "param" in ds._md_columns
+    ds1 = ds[::2]
+    ref = [
+        f.metadata(["param", "level"])
+        for f in ds1
+        if Selection(params, remapping=remapping).match_element(f)
+    ]
+    r = ds1.sel(params, remapping=remapping)
+    assert r.metadata(["param", "level"]) == ref
+
+
+def test_sel_with_metadata_columns_multi():
+    ds1 = from_source("file", earthkit_examples_file("test.grib"))
+    ds2 = from_source("file", earthkit_examples_file("test6.grib"))
+    ds = ds1 + ds2
+
+    r = ds.sel(param=["2t", "t"])
+    assert r.metadata("param") == ["2t", "t", "t"]
+
+    c = ds._metadata_columns(["param"])["param"]
+    assert np.asarray([c[i] for i in range(len(c))]).tolist() == ds.metadata("param")
@@ -159,6 +159,39 @@ def test_grib_metadata_get():
         md.get("centre", "shortName", "step")
 
 
+def test_grib_metadata_memo(monkeypatch):
+    ds = from_source("file", earthkit_examples_file("test.grib"))
+    f = ds[0]
+    md = f.metadata()
+
+    calls = []
+    get = md._handle.get
+
+    def _get(name, *args, **kwargs):
+        calls.append(name)
+        return get(name, *args, **kwargs)
+
+    monkeypatch.setattr(md._handle, "get", _get)
+
+    for _ in range(3):
+        assert md["shortName"] == "2t"
+        assert md.get("param") == "2t"
+        assert f.metadata("level", astype=str) == "0"
+        assert f.metadata("level", astype=int) == 0
+        assert md.get("nonExistentKey", 12) == 12
+        with pytest.raises(KeyError):
+            md["nonExistentKey"]
+    assert calls == ["shortName", "shortName", "level", "level", "nonExistentKey"]
+
+    # the arrays are not memoized
+    assert md["values"] is not md["values"]
+
+    # the overridden metadata does not use the memo
+    md2 = md.override(shortName="2d")
+    assert md2["shortName"] == "2d"
+    assert md["shortName"] == "2t"
+
+
 def test_grib_grib_metadata_valid_datetime():
     ds = from_source("file", earthkit_test_data_file("t_time_series.grib"))
     md = ds[4].metadata()
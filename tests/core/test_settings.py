@@ -76,6 +76,26 @@ def test_settings_invalid():
         ("reader-type-check-bytes", 8, 8, None),
         ("reader-type-check-bytes", 1, 1, ValueError),
         ("reader-type-check-bytes", 4097, 4097, ValueError),
+        ("number-of-decode-threads", 4, 4, None),
+        ("number-of-decode-threads", 0, 0, ValueError),
+        ("number-of-message-scan-threads", 8, 8, None),
+        ("number-of-message-scan-threads", 0, 0, ValueError),
+        ("message-reader-cache-size", 1000, 1000, None),
+        ("message-reader-cache-size", 0, 0, ValueError),
+        ("message-reader-mode", "pread", "pread", None),
+        ("message-reader-mode", "mmap", "mmap", None),
+        ("message-reader-mode", "abc", None, ValueError),
+        ("default-dtype", "float32", "float32", None),
+        ("default-dtype", None, None, None),
+        ("default-dtype", "int8", None, ValueError),
+        ("maximum-grib-values-cache-size", "10M", 10 * 1024 * 1024, None),
+        ("maximum-grid-coordinates-cache-size", "1G", 1024 * 1024 * 1024, None),
+        ("maximum-grid-coordinates-cache-size", 0, 0, None),
+        ("message-read-ahead-size", "64M", 64 * 1024 * 1024, None),
+        ("message-read-ahead-size", 0, 0, None),
+        ("message-read-ahead-size", None, None, None),
+        ("maximum-grib-handles-size", "2G", 2 * 1024 * 1024 * 1024, None),
+        ("maximum-grib-handles-size", None, None, None),
     ],
 )
 def test_settings_set_numbers(param, set_value, stored_value, raise_error):
@@ -134,6 +134,40 @@ def test_grib_from_empty_3():
     _check_save_to_disk(ds3, 8, md)
 
 
+def test_grib_concat_nested():
+    ds1 = from_source("file", earthkit_examples_file("test.grib"))
+    ds2 = from_source("file", earthkit_examples_file("test6.grib"))
+    ds3 = from_source("file", earthkit_examples_file("tuv_pl.grib"))
+
+    ds = ds1 + ds2 + ds3
+    assert len(ds) == 26
+    assert ds.indexes == [ds1, ds2, ds3]
+    assert ds.metadata("param") == (
+        ds1.metadata("param") + ds2.metadata("param") + ds3.metadata("param")
+    )
+
+    r = ds[1:25:3]
+    assert r.metadata("param") == [ds.metadata("param")[i] for i in range(1, 25, 3)]
+    assert r[-1].metadata("level") == ds[22].metadata("level")
+
+
+def test_grib_concat_getitem():
+    ds1 = from_source("file", earthkit_examples_file("test.grib"))
+    ds2 = from_source("file", earthkit_examples_file("test6.grib"))
+    ds3 = from_source("file", earthkit_examples_file("tuv_pl.grib"))
+
+    ds = ds1 + ds2 + ds3
+    ref = ds1.metadata("param") + ds2.metadata("param") + ds3.metadata("param")
+
+    assert [f.metadata("param") for f in ds] == ref
+    assert [ds[i].metadata("param") for i in range(len(ds))] == ref
+    assert [ds[i].metadata("param") for i in range(-len(ds), 0)] == ref
+
+    for i in (len(ds), -len(ds) - 1):
+        with pytest.raises(IndexError):
+            ds[i]
+
+
 if __name__ == "__main__":
     from earthkit.data.testing import main
 
@@ -15,6 +15,9 @@ import sys
 import numpy as np
 import pytest
 
+from earthkit.data import from_source
+from earthkit.data.testing import earthkit_examples_file
+
 here = os.path.dirname(__file__)
 sys.path.insert(0, here)
 from grib_fixtures import load_file_or_numpy_fs  # noqa: E402
@@ -70,6 +73,57 @@ def test_grib_to_pandas(mode):
     assert np.isclose(df["value"][0], 260.435608)
 
 
+@pytest.mark.parametrize("mode", ["file", "numpy_fs"])
+def test_grib_to_pandas_multi(mode):
+    f = load_file_or_numpy_fs("tuv_pl.grib", mode)
+
+    df = f.to_pandas()
+    assert len(df) == 18 * 84
+    assert list(df.index[82:86]) == [82, 83, 0, 1]
+    assert np.allclose(df["lat"][83:85], [-90, 90])
+    assert np.allclose(df["value"].values[:84], f[0].to_numpy(flatten=True))
+    assert np.allclose(df["value"].values[-84:], f[-1].to_numpy(flatten=True))
+    assert str(df["datetime"].dtype) == "datetime64[ns]"
+    assert [t.to_pydatetime() for t in df["datetime"][::84]] == [
+        x.datetime()["valid_time"] for x in f
+    ]
+    # the strings are stored as categoricals
+    assert df["param"].dtype == "category"
+    assert list(df["param"].cat.categories) == ["t", "u", "v"]
+    assert list(df["param"][::84]) == f.metadata("param")
+    assert list(df["levelist"][::84]) == f.metadata("levelist")
+
+    # specific location
+    df = f.to_pandas(latitude=60, longitude=0)
+    assert len(df) == 18
+    assert np.allclose(df["lat"], 60)
+    assert list(df["param"]) == f.metadata("param")
+
+
+@pytest.mark.parametrize("mode", ["file", "numpy_fs"])
+def test_grib_to_pandas_columns(mode):
+    f = load_file_or_numpy_fs("tuv_pl.grib", mode)
+
+    df = f.to_pandas(columns=["value", "param", "level", "datetime"])
+    assert list(df.columns) == ["value", "param", "level", "datetime"]
+    assert len(df) == 18 * 84
+    assert list(df["level"][::84]) == f.metadata("level")
+    assert list(df["param"][::84]) == f.metadata("param")
+
+
+def test_grib_to_pandas_mixed_grids():
+    f = from_source(
+        "file",
+        [earthkit_examples_file("test.grib"), earthkit_examples_file("test6.grib")],
+    )
+
+    df = f.to_pandas(columns=["lat", "lon", "value", "shortName"])
+    sizes = f.metadata("numberOfDataPoints")
+    assert len(df) == sum(sizes)
+    assert list(df["shortName"].iloc[np.cumsum(sizes) - 1]) == f.metadata("shortName")
+    assert np.allclose(df["value"].values[-84:], f[-1].to_numpy(flatten=True))
+
+
 if __name__ == "__main__":
     from earthkit.data.testing import main
 
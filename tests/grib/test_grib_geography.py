@@ -214,6 +214,228 @@ def test_grib_projection_mercator(mode):
     assert projection.globe == dict()
 
 
+@pytest.mark.parametrize("mode", ["file", "numpy_fs"])
+def test_grib_latlon_cache(mode):
+    from earthkit.data import settings
+    from earthkit.data.readers.grib.metadata import COORDS_CACHE
+
+    COORDS_CACHE.clear()
+    ds = load_file_or_numpy_fs("tuv_pl.grib", mode)
+
+    ll0 = ds[0].to_latlon(flatten=True)
+    assert COORDS_CACHE.info()["misses"] == 1
+
+    # all the fields are on the same grid
+    for f in ds:
+        ll = f.to_latlon(flatten=True)
+        assert ll["lat"] is ll0["lat"]
+        assert ll["lon"] is ll0["lon"]
+    assert COORDS_CACHE.info()["misses"] == 1
+    assert not ll0["lat"].flags.writeable
+
+    with pytest.raises(ValueError):
+        ll0["lat"][0] = 1
+
+    d = ds.data(flatten=True)
+    assert np.array_equal(d[0], ll0["lat"])
+    assert ds[0].to_latlon(flatten=True, dtype=np.float32)["lat"].dtype == np.float32
+
+    with settings.temporary("maximum-grid-coordinates-cache-size", 0):
+        ll = ds[0].to_latlon(flatten=True)
+        assert ll["lat"] is not ll0["lat"]
+        assert ll["lat"].flags.writeable
+        assert np.array_equal(ll["lat"], ll0["lat"])
+
+    COORDS_CACHE.clear()
+
+
+def test_grib_latlon_cache_grids():
+    from earthkit.data import from_source
+    from earthkit.data.testing import earthkit_examples_file
+
+    ds1 = from_source("file", earthkit_examples_file("test.grib"))
+    ds2 = from_source("file", earthkit_examples_file("test6.grib"))
+
+    assert ds1[0].to_latlon(flatten=True)["lat"].shape == (209,)
+    assert ds2[0].to_latlon(flatten=True)["lat"].shape == (84,)
+
+
+@pytest.mark.parametrize("n", [32, 48, 640])
+def test_grib_gaussian_latitudes(n):
+    import eccodes
+
+    from earthkit.data.readers.grib.coords import gaussian_latitudes
+
+    ref = eccodes.codes_get_gaussian_latitudes(n)
+    ref = np.array([ref[i] for i in range(2 * n)])
+    assert np.allclose(gaussian_latitudes(n), ref, rtol=0, atol=1e-10)
+
+
+def _grid_fields():
+    from earthkit.data import from_source
+    from earthkit.data.readers.grib.codes import GribCodesHandle
+    from earthkit.data.readers.grib.memory import GribFieldInMemory
+    from earthkit.data.testing import earthkit_examples_file, earthkit_test_data_file
+
+    for name in (
+        "regular_ll_sfc_grib2",
+        "regular_gg_pl_grib2",
+        "regular_gg_sfc_grib1",
+        "reduced_gg_pl_32_grib2",
+        "reduced_gg_sfc_grib1",
+        "reduced_gg_pl_640_grib2",
+    ):
+        yield name, GribFieldInMemory(GribCodesHandle.from_sample(name)), True
+
+    for path, supported in (
+        (earthkit_examples_file("test6.grib"), True),
+        (earthkit_test_data_file("ml_data.grib"), True),
+        (earthkit_test_data_file("rgg_small_subarea_cellarea_ref.grib"), False),
+        (earthkit_test_data_file("mercator.grib"), False),
+    ):
+        yield path, from_source("file", path)[0], supported
+
+
+@pytest.mark.parametrize("name,field,supported", list(_grid_fields()))
+def test_grib_grid_coords(name, field, supported):
+    from earthkit.data.readers.grib.coords import grid_coords
+
+    md = field.metadata()
+    r = grid_coords(md)
+    if not supported:
+        assert r is None
+        return
+
+    assert r is not None
+    lat, lon = r
+    assert np.allclose(lat, md._handle.get_latitudes(), rtol=0, atol=1e-9)
+    assert np.allclose(lon, md._handle.get_longitudes(), rtol=0, atol=1e-9)
+
+    ll = field.to_latlon(flatten=True)
+    assert np.array_equal(ll["lat"], lat)
+    assert np.array_equal(ll["lon"], lon)
+
+
+@pytest.mark.parametrize("name,field,supported", list(_grid_fields()))
+def test_grib_grid_id(name, field, supported):
+    import eccodes
+
+    handle = field.metadata()._handle
+    h = handle._handle
+    shape = eccodes.codes_get_long(h, "shapeOfTheEarth")
+    r = handle.get_md5GridSection()
+    assert eccodes.codes_get_long(h, "shapeOfTheEarth") == shape
+
+    # the value ecCodes computes with the earth shape masked out
+    h = eccodes.codes_clone(h)
+    try:
+        eccodes.codes_set_long(h, "shapeOfTheEarth", 255)
+        assert r == eccodes.codes_get_string(h, "md5GridSection")
+    finally:
+        eccodes.codes_release(h)
+
+
+@pytest.mark.parametrize("name", ["sh_ml_grib2", "sh_ml_grib1"])
+def test_grib_grid_id_spectral(name):
+    import eccodes
+
+    from earthkit.data.readers.grib.codes import GribCodesHandle
+
+    # the spectral grid section does not contain the shape of the earth
+    handle = GribCodesHandle.from_sample(name)
+    assert handle.get_md5GridSection() == eccodes.codes_get_string(
+        handle._handle, "md5GridSection"
+    )
+
+
+def test_grib_shared_grid_without_handles(monkeypatch):
+    from earthkit.data import from_source
+    from earthkit.data.readers.grib.index import GribFieldListInFiles
+    from earthkit.data.testing import earthkit_examples_file
+
+    ds1 = from_source("file", earthkit_examples_file("test.grib"))
+    ds2 = from_source("file", earthkit_examples_file("test6.grib"))
+    r = ds2.order_by("param")
+
+    def no_field(self, n):
+        raise AssertionError("field accessed")
+
+    monkeypatch.setattr(GribFieldListInFiles, "__getitem__", no_field)
+
+    assert ds1._is_shared_grid()
+    assert ds2._is_shared_grid()
+    assert not (ds1 + ds2)._is_shared_grid()
+
+    assert r._is_shared_grid()
+    assert r._metadata_columns(["md5GridSection"])["md5GridSection"].unique() == [
+        ds2._metadata_columns(["md5GridSection"])["md5GridSection"][0]
+    ]
+
+
+def _grid_template_handles():
+    # one handle per grid template in the test data and the ecCodes samples
+    import glob
+
+    import eccodes
+
+    from earthkit.data import from_source
+    from earthkit.data.readers.grib.codes import GribCodesHandle
+    from earthkit.data.testing import earthkit_test_data_file
+
+    handles = []
+    for path in sorted(
+        glob.glob(os.path.join(os.path.dirname(earthkit_test_data_file("t_pl.grib")), "*.grib*"))
+    ):
+        handles.extend(f.metadata()._handle for f in from_source("file", path))
+
+    for path in sorted(glob.glob(os.path.join(eccodes.codes_samples_path(), "*_grib*.tmpl"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        handles.append(GribCodesHandle.from_sample(name))
+
+    seen = {}
+    for h in handles:
+        edition = h.get("edition")
+        key = "gridDefinitionTemplateNumber" if edition == 2 else "dataRepresentationType"
+        template = (edition, h.get(key, default=None))
+        if template not in seen:
+            seen[template] = h
+    return seen
+
+
+def test_grib_grid_id_templates():
+    import eccodes
+
+    for template, handle in _grid_template_handles().items():
+        r = handle.get_md5GridSection()
+
+        # the value ecCodes computes with the earth shape masked out
+        h = eccodes.codes_clone(handle._handle)
+        try:
+            if eccodes.codes_is_defined(h, "shapeOfTheEarth"):
+                eccodes.codes_set_long(h, "shapeOfTheEarth", 255)
+            assert r == eccodes.codes_get_string(h, "md5GridSection"), template
+        finally:
+            eccodes.codes_release(h)
+
+
+def test_grib_grid_id_cached(monkeypatch):
+    from earthkit.data.readers.grib.codes import GribCodesHandle
+
+    handle = GribCodesHandle.from_sample("regular_ll_sfc_grib2")
+    ref = handle.get_md5GridSection()
+
+    def _no_buffer(self):
+        raise AssertionError("message copied")
+
+    monkeypatch.setattr(GribCodesHandle, "get_buffer", _no_buffer)
+    assert handle.get_md5GridSection() == ref
+
+    # the grid changes
+    monkeypatch.undo()
+    handle.set_long("jScansPositively", 1)
+    assert handle.get_md5GridSection() != ref
+
+
 if __name__ == "__main__":
     from earthkit.data.testing import main
 
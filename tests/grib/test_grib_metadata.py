@@ -560,6 +560,145 @@ def test_message(mode):
     assert v[:4] == b"GRIB"
 
 
+@pytest.mark.parametrize("nthreads", [1, 4])
+def test_grib_metadata_table(nthreads):
+    from earthkit.data import settings
+
+    ds = from_source("file", earthkit_examples_file("tuv_pl.grib"))[::-1]
+    keys = ["param", "level", "step", "date", "nonExistentKey"]
+    ref = ds.metadata(keys, default=None)
+
+    with settings.temporary("number-of-decode-threads", nthreads):
+        r = ds.metadata_table(keys)
+
+    assert list(r.keys()) == keys
+    assert r["param"].dtype.kind == "U"
+    assert r["level"].dtype.kind == "i"
+    assert r["nonExistentKey"].dtype == object
+    for j, k in enumerate(keys):
+        assert r[k].tolist() == [x[j] for x in ref]
+
+    r = ds.metadata_table(["level", "step"], astype={"level": float})
+    assert r["level"].dtype == np.float64
+    assert r["level"][:3].tolist() == [300.0, 300.0, 300.0]
+    assert r["step"].dtype.kind == "i"
+
+    r = ds.metadata_table("level", astype=str)
+    assert r["level"][:3].tolist() == ["300", "300", "300"]
+
+    with pytest.raises(ValueError):
+        ds.metadata_table(["level", "step"], astype=[str])
+
+    with pytest.raises(ValueError):
+        ds.metadata_table(["level"], output="xarray")
+
+
+def test_grib_metadata_table_unhashable():
+    ds = from_source("file", earthkit_examples_file("test.grib"))
+    r = ds.metadata_table(["param", "distinctLatitudes"])
+    assert r["param"].tolist() == ["2t", "msl"]
+    assert r["distinctLatitudes"].dtype == object
+    ref = ds[1].metadata("distinctLatitudes")
+    assert np.array_equal(r["distinctLatitudes"][1], ref)
+
+    # the values already extracted are not read again
+    ds = from_source("file", earthkit_examples_file("test.grib"))
+    calls = []
+    rows = ds._metadata_rows
+
+    def _metadata_rows(keys):
+        calls.append(list(keys))
+        return rows(keys)
+
+    ds._metadata_rows = _metadata_rows
+    r = ds.metadata_table(["param", "distinctLatitudes"])
+    assert r["param"].tolist() == ["2t", "msl"]
+    assert np.array_equal(r["distinctLatitudes"][1], ref)
+    assert calls == [["param", "distinctLatitudes"]]
+
+
+def test_grib_metadata_records_unhashable(monkeypatch):
+    from earthkit.data.core.fieldlist import Field
+
+    ds = from_source("file", earthkit_examples_file("test.grib"))
+    calls = []
+    attributes = Field._attributes
+
+    def _attributes(self, names):
+        calls.append(list(names))
+        return attributes(self, names)
+
+    monkeypatch.setattr(Field, "_attributes", _attributes)
+
+    # only the keys with unhashable values are read from the fields
+    r = ds._metadata_records(["param", "distinctLatitudes"], range(len(ds)))
+    assert [x["param"] for x in r] == ["2t", "msl"]
+    assert np.array_equal(r[1]["distinctLatitudes"], ds[1].metadata("distinctLatitudes"))
+    assert calls == [["distinctLatitudes"], ["distinctLatitudes"]]
+
+
+def test_grib_metadata_table_pandas():
+    pytest.importorskip("pandas")
+
+    ds = from_source("file", earthkit_examples_file("test6.grib"))
+    df = ds.metadata_table(["param", "level"], output="pandas")
+    assert list(df.columns) == ["param", "level"]
+    assert df["param"].tolist() == ["t", "u", "v", "t", "u", "v"]
+    assert df["level"].tolist() == [1000, 1000, 1000, 850, 850, 850]
+
+
+@pytest.mark.parametrize("read_ahead", [0, "16M"])
+def test_grib_handles_released(read_ahead):
+    from earthkit.data import settings
+    from earthkit.data.readers.grib.codes import grib_handles_info
+
+    ds = from_source("file", earthkit_examples_file("tuv_pl.grib"))
+    ref = ds.metadata(["param", "level"])
+    ref_values = ds.to_numpy()
+
+    start = grib_handles_info()
+    with settings.temporary(
+        {"maximum-grib-handles-size": 450, "message-read-ahead-size": read_ahead}
+    ):
+        fields = []
+        for f in ds:
+            fields.append(f)
+            assert f.metadata(["param", "level"]) == ref[len(fields) - 1]
+            # the messages are 150 bytes long
+            assert grib_handles_info()["size"] <= 450
+
+        assert sum(f._handle is not None for f in fields) == 3
+        # the handles alive before are released first
+        assert grib_handles_info()["releases"] - start["releases"] == 15 + start["count"]
+
+        # the released handles are created again when needed
+        assert [f.metadata(["param", "level"]) for f in fields] == ref
+        assert np.array_equal(np.array([f.to_numpy() for f in fields]), ref_values)
+        assert grib_handles_info()["count"] == 3
+
+    # the deleted fields are removed
+    del fields, f
+    assert grib_handles_info()["count"] == 0
+
+
+def test_grib_handles_info():
+    from earthkit.data.readers.grib.codes import grib_handles_info
+
+    # the handles are counted without a size limit
+    ds = from_source("file", earthkit_examples_file("tuv_pl.grib"))
+    start = grib_handles_info()
+    fields = list(ds)
+    assert [f.metadata("param") for f in fields] == ds.metadata("param")
+
+    r = grib_handles_info()
+    assert r["count"] - start["count"] == 18
+    assert r["size"] - start["size"] == 18 * 150
+    assert r["releases"] == start["releases"]
+
+    del fields
+    assert grib_handles_info()["count"] == start["count"]
+
+
 if __name__ == "__main__":
     from earthkit.data.testing import main
 
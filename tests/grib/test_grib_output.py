@@ -18,7 +18,7 @@ import numpy as np
 import pytest
 
 import earthkit.data
-from earthkit.data import from_source
+from earthkit.data import from_source, settings
 from earthkit.data.core.temporary import temp_file
 from earthkit.data.testing import earthkit_examples_file
 
@@ -34,6 +34,26 @@ def test_grib_save_when_loaded_from_file():
         assert len(fs) == len(fs_saved)
 
 
+@pytest.mark.parametrize("mode", ["file", "pread", "mmap"])
+def test_grib_save_order_by(mode):
+    ds = from_source("file", earthkit_examples_file("tuv_pl.grib"))
+    ref = ds.order_by(level="ascending", param="descending")
+    messages = [f.message() for f in ref]
+
+    # new fields, without handles
+    r = ds.order_by(level="ascending", param="descending")[::-1]
+    with temp_file() as tmp, settings.temporary("message-reader-mode", mode):
+        r.save(tmp)
+        with open(tmp, "rb") as f:
+            assert f.read() == b"".join(messages[::-1])
+
+        # field in memory
+        m = from_source("memory", messages[0])
+        m.sel(param="v").save(tmp)
+        with open(tmp, "rb") as f:
+            assert f.read() == messages[0]
+
+
 @pytest.mark.skipif(
     sys.version_info < (3, 10),
     reason="ignore_cleanup_errors requires Python 3.10 or later",
@@ -316,6 +316,31 @@ def test_grib_isel_slice_multi_file(mode):
     ]
 
 
+@pytest.mark.parametrize("mode", ["file", "numpy_fs"])
+def test_grib_isel_on_selection(mode):
+    f = load_file_or_numpy_fs("tuv_pl.grib", mode)
+
+    g = f.sel(param="u")
+    assert g.index("level") == [300, 400, 500, 700, 850, 1000]
+    assert g.indices(squeeze=True) == {
+        "levelist": [300, 400, 500, 700, 850, 1000],
+        "level": [300, 400, 500, 700, 850, 1000],
+    }
+
+    r = g.isel(level=[1, 3])
+    assert r.metadata(["param", "level"]) == [["u", 700], ["u", 400]]
+
+
+@pytest.mark.parametrize("mode", ["file", "numpy_fs"])
+def test_grib_indices_per_instance(mode):
+    f1 = load_file_or_numpy_fs("tuv_pl.grib", mode)
+    f2 = load_file_or_numpy_fs("test.grib", mode)
+
+    assert f1.index("param") == ["t", "u", "v"]
+    assert f2.indices(squeeze=True) == {"param": ["2t", "msl"]}
+    assert "level" not in f2.indices()
+
+
 if __name__ == "__main__":
     from earthkit.data.testing import main
 
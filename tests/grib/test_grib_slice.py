@@ -138,6 +138,60 @@ def test_grib_fieldlist_iterator(mode):
     assert iter_sn == sn
 
 
+@pytest.mark.parametrize(
+    "size,background,expected_reads",
+    [
+        ("1M", False, 1),
+        ("1M", True, 1),
+        (500, False, 9),
+        (500, True, 9),
+        (0, False, 0),
+        (None, False, 0),
+    ],
+)
+def test_grib_fieldlist_iterator_read_ahead(
+    size, background, expected_reads, monkeypatch
+):
+    from earthkit.data import settings
+    from earthkit.data.utils.message import CodesReader
+
+    g = from_source("file", earthkit_examples_file("tuv_pl.grib"))
+    ref = g.to_numpy()
+    sn = g.metadata("shortName")
+
+    reads = []
+    read = CodesReader.read
+
+    def _read(self, offset, length):
+        reads.append(length)
+        return read(self, offset, length)
+
+    monkeypatch.setattr(CodesReader, "read", _read)
+    with settings.temporary(
+        {
+            "message-read-ahead-size": size,
+            "use-message-read-ahead-thread": background,
+        }
+    ):
+        fields = list(g)
+
+    assert len(reads) == expected_reads
+    assert [f.metadata("shortName") for f in fields] == sn
+    assert np.array_equal(np.array([f.to_numpy() for f in fields]), ref)
+
+    # the iteration can be stopped at any point
+    with settings.temporary(
+        {
+            "message-read-ahead-size": size,
+            "use-message-read-ahead-thread": background,
+        }
+    ):
+        for i, f in enumerate(g):
+            if i == 3:
+                break
+        assert f.metadata("shortName") == sn[3]
+
+
 @pytest.mark.parametrize("mode", ["file", "numpy_fs"])
 def test_grib_fieldlist_iterator_with_zip(mode):
     # test something different to the iterator - does not try to
@@ -183,3 +237,16 @@ def test_grib_fieldlist_reverse_iterator(mode):
     assert len(iter_sn) == len(sn_reversed)
     assert iter_sn == sn_reversed
     assert iter_sn == ["v", "u", "t"] * 6
+
+
+@pytest.mark.parametrize("mode", ["file", "numpy_fs"])
+def test_grib_slice_chained(mode):
+    g = load_file_or_numpy_fs("tuv_pl.grib", mode)
+
+    r = g.sel(param=["t", "u"]).order_by(level="ascending")[::4].sel(param="t")
+    assert r.metadata(["param", "level"]) == [["t", 300], ["t", 500], ["t", 850]]
+
+    # the chain is composed into a single mask of the original fieldlist
+    assert r._index is g
+    assert r._indices.tolist() == [15, 9, 3]
+    assert r[-1].metadata("level") == 850
@@ -355,6 +355,162 @@ def test_grib_values_with_missing(mode):
     assert np.count_nonzero(np.isnan(m)) == 38
 
 
+@pytest.mark.parametrize("mode", ["file", "numpy_fs"])
+def test_grib_values_with_missing_float32(mode):
+    f = load_file_or_numpy_fs("test_single_with_missing.grib", mode, folder="data")
+
+    v = f[0].to_numpy(flatten=True, dtype=np.float32)
+    assert v.dtype == np.float32
+    assert np.count_nonzero(np.isnan(v)) == 38
+    assert np.allclose(v, f[0].values, equal_nan=True)
+
+
+@pytest.mark.parametrize("mode", ["file", "numpy_fs"])
+def test_grib_default_dtype(mode):
+    from earthkit.data import settings
+
+    f = load_file_or_numpy_fs("test6.grib", mode)
+    ref = f.to_numpy()
+    assert ref.dtype == np.float64
+
+    with settings.temporary("default-dtype", "float32"):
+        assert f[0].values.dtype == np.float32
+        assert f.values.dtype == np.float32
+
+        v = f.to_numpy()
+        assert v.dtype == np.float32
+        assert np.allclose(v, ref)
+
+        assert f[0].data().dtype == np.float32
+        assert f.data().dtype == np.float32
+
+        latlon = f[0].to_latlon()
+        assert latlon["lat"].dtype == np.float32
+        assert latlon["lon"].dtype == np.float32
+
+        points = f[0].to_points()
+        assert points["x"].dtype == np.float32
+        assert points["y"].dtype == np.float32
+
+        # an explicit dtype takes precedence
+        assert f.to_numpy(dtype=np.float64).dtype == np.float64
+
+
+def test_grib_values_cache():
+    from earthkit.data import from_source, settings
+    from earthkit.data.readers.grib.codes import VALUES_CACHE
+    from earthkit.data.testing import earthkit_examples_file
+
+    VALUES_CACHE.clear()
+    ds = from_source("file", earthkit_examples_file("test6.grib"))
+    ref = ds.to_numpy()
+
+    with settings.temporary(
+        {"use-grib-values-cache": True, "maximum-grib-values-cache-size": "10M"}
+    ):
+        v1 = ds[0].values
+        assert VALUES_CACHE.info()["misses"] == 1
+
+        # a new field object and a view share the cached array
+        v2 = ds[0].values
+        v3 = ds[0:2][0].values
+        assert v1 is v2
+        assert v1 is v3
+        assert not v1.flags.writeable
+        assert VALUES_CACHE.info()["hits"] == 2
+
+        assert np.array_equal(ds.to_numpy(), ref)
+        assert ds[1].to_numpy(dtype=np.float32).dtype == np.float32
+        assert VALUES_CACHE.info()["count"] == 7
+
+    assert ds[0].values is not v1
+    VALUES_CACHE.clear()
+
+
+@pytest.mark.parametrize("mode", ["file", "numpy_fs"])
+def test_grib_to_numpy_out(mode):
+    f = load_file_or_numpy_fs("tuv_pl.grib", mode)
+
+    ref = np.array([g.to_numpy(flatten=True) for g in f])
+
+    out = np.zeros((18, 84), dtype=np.float32)
+    v = f.to_numpy(flatten=True, out=out)
+    assert v is out
+    assert np.allclose(v, ref, rtol=1e-6)
+
+    with pytest.raises(ValueError):
+        f.to_numpy(out=np.zeros((18, 84)))
+
+
+@pytest.mark.parametrize("mode", ["file", "numpy_fs"])
+@pytest.mark.parametrize("nthreads", [2, 5, 30])
+def test_grib_values_threads(mode, nthreads):
+    from earthkit.data import settings
+
+    f = load_file_or_numpy_fs("tuv_pl.grib", mode)
+    ref = np.array([g.values for g in f])
+
+    with settings.temporary("number-of-decode-threads", nthreads):
+        assert np.array_equal(f.values, ref)
+        assert np.array_equal(f.to_numpy(flatten=True), ref)
+        assert np.array_equal(f[3:12].to_numpy(flatten=True), ref[3:12])
+
+        d = f.data(flatten=True)
+        assert d.shape == (20, 84)
+        assert np.array_equal(d[2:], ref)
+
+
+@pytest.mark.parametrize("mode", ["pread", "mmap"])
+@pytest.mark.parametrize("nthreads", [1, 3])
+def test_grib_to_numpy_scheduled_reads(mode, nthreads, monkeypatch):
+    from earthkit.data import from_source, settings
+    from earthkit.data.testing import earthkit_examples_file
+    from earthkit.data.utils.message import CodesReader
+
+    ds1 = from_source("file", earthkit_examples_file("tuv_pl.grib"))
+    ds2 = from_source("file", earthkit_examples_file("test6.grib"))
+    ds = (ds1 + ds2).order_by(param="descending")
+    ref = np.array([f.to_numpy(flatten=True) for f in ds[1:]])
+
+    # the messages are not read one by one
+    reads = []
+    read = CodesReader.read
+
+    def _read(self, offset, length):
+        reads.append((self.path, offset, length))
+        return read(self, offset, length)
+
+    monkeypatch.setattr(CodesReader, "read", _read)
+    with settings.temporary(
+        {"message-reader-mode": mode, "number-of-decode-threads": nthreads}
+    ):
+        r = ds[1:].to_numpy(flatten=True)
+
+    assert np.array_equal(r, ref)
+    assert len(reads) <= 2 * nthreads
+
+
+def test_grib_to_numpy_scheduled_reads_file_mode(monkeypatch):
+    from earthkit.data import from_source
+    from earthkit.data.testing import earthkit_examples_file
+    from earthkit.data.utils.message import CodesReader
+
+    ds = from_source("file", earthkit_examples_file("tuv_pl.grib"))
+    ref = np.array([f.to_numpy() for f in ds])
+
+    # by default ecCodes reads each message from the file
+    reads = []
+    read = CodesReader.read
+
+    def _read(self, offset, length):
+        reads.append((self.path, offset, length))
+        return read(self, offset, length)
+
+    monkeypatch.setattr(CodesReader, "read", _read)
+    assert np.array_equal(ds.to_numpy(), ref)
+    assert reads == []
+
+
 if __name__ == "__main__":
     from earthkit.data.testing import main
 
@@ -44,6 +44,60 @@ def test_indexing_db_directory():
     assert ds.db.count() == 18
 
 
+def test_indexing_db_metadata_table():
+    tmp, path = get_tmp_fixture("file")
+    ds = from_source("file", path, indexing=True).order_by(levelist="descending")
+    keys = ["param", "levelist", "date", "step"]
+    ref = ds.metadata(keys)
+
+    def _metadata_rows(*args, **kwargs):
+        raise AssertionError("the fields must not be accessed")
+
+    # the values are taken from the database
+    ds._metadata_rows = _metadata_rows
+    r = ds.metadata_table(keys)
+    for j, k in enumerate(keys):
+        assert r[k].tolist() == [x[j] for x in ref]
+
+    assert r["levelist"][:3].tolist() == [1000, 1000, 1000]
+
+
+def test_indexing_db_ls(monkeypatch):
+    from earthkit.data.utils.message import CodesReader
+
+    tmp, path = get_tmp_fixture("file")
+    ds = from_source("file", path, indexing=True)
+    keys = ["param", "levelist", "date"]
+    ref = ds.head(3, keys=keys)
+
+    def _no_handle(self, *args):
+        raise AssertionError("message read")
+
+    # the values are taken from the database
+    monkeypatch.setattr(CodesReader, "at_offset", _no_handle)
+    monkeypatch.setattr(CodesReader, "read", _no_handle)
+    ds = from_source("file", path, indexing=True)
+    assert ds.head(3, keys=keys).equals(ref)
+    assert ds.tail(3, keys=keys)["levelist"].tolist() == [300, 300, 300]
+    monkeypatch.undo()
+
+    # only the keys not in the database are read from the fields
+    from earthkit.data.readers.grib.codes import GribField
+
+    names = []
+    attributes = GribField._attributes
+
+    def _attributes(self, keys):
+        names.append(list(keys))
+        return attributes(self, keys)
+
+    monkeypatch.setattr(GribField, "_attributes", _attributes)
+    r = ds.head(2, keys=keys + ["gridType"])
+    assert names == [["gridType"], ["gridType"]]
+    assert r["levelist"].tolist() == ref["levelist"].tolist()[:2]
+    assert r["gridType"].tolist() == ["regular_ll", "regular_ll"]
+
+
 if __name__ == "__main__":
     from earthkit.data.testing import main
 
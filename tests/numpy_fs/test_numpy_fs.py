@@ -113,6 +113,17 @@ def test_numpy_fs_grib_from_list_of_arrays_bad():
         _ = FieldList.from_numpy([v], md)
 
 
+def test_numpy_fs_grib_to_numpy_is_copy():
+    ds = from_source("file", earthkit_examples_file("test.grib"))
+    v = ds[0].to_numpy(flatten=True)
+    r = FieldList.from_numpy(v, ds[0].metadata())
+
+    # the result can be modified without changing the field
+    a = r[0].to_numpy(flatten=True, dtype=v.dtype)
+    a += 1
+    assert np.array_equal(r[0].to_numpy(flatten=True), v)
+
+
 if __name__ == "__main__":
     from earthkit.data.testing import main
 
@@ -41,11 +41,14 @@ def test_numpy_fs_grib_write_missing():
 
     assert np.isnan(r[0].values[0])
     assert not np.isnan(r[0].values[1])
+    assert md1["bitmapPresent"] == 0
 
     # save to disk
     tmp = temp_file()
     r.save(tmp.path)
     assert os.path.exists(tmp.path)
+    # the memoized values of the modified handle are not used
+    assert md1["bitmapPresent"] == 1
     r_tmp = from_source("file", tmp.path)
     v_tmp = r_tmp[0].values
     assert np.isnan(v_tmp[0])
@@ -9,7 +9,11 @@
 # nor does it submit to any jurisdiction.
 #
 
-from earthkit.data import from_source
+import numpy as np
+import pytest
+
+from earthkit.data import from_source, settings
+from earthkit.data.core.temporary import temp_file
 
 
 def test_grib_len():
@@ -40,6 +44,63 @@ def test_dummy_grib():
     assert len(s) == 8
 
 
+def test_grib_message_positions_with_junk():
+    from earthkit.data.readers.grib.codes import GribCodesMessagePositionIndex
+
+    path = "docs/examples/test6.grib"
+    ref = GribCodesMessagePositionIndex(path)
+    assert isinstance(ref.offsets, np.ndarray)
+    assert ref.offsets.dtype == np.int64
+    assert len(ref) == 6
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    # junk before, between and after the messages, including truncated markers
+    junk = [b"GRI", b"xxGRxB", b"\0" * 13, b"GRIB\0"]
+    tmp = temp_file()
+    offsets = []
+    with open(tmp.path, "wb") as f:
+        for i, (offset, length) in enumerate(zip(ref.offsets, ref.lengths)):
+            f.write(junk[i % len(junk)])
+            offsets.append(f.tell())
+            f.write(data[offset : offset + length])
+        f.write(b"GRIB")
+
+    r = GribCodesMessagePositionIndex(tmp.path)
+    assert r.offsets.tolist() == offsets
+    assert r.lengths.tolist() == ref.lengths.tolist()
+
+    ds = from_source("file", tmp.path)
+    assert ds.metadata("param") == ["t", "u", "v", "t", "u", "v"]
+
+
+def test_grib_message_positions_empty_file():
+    from earthkit.data.readers.grib.codes import GribCodesMessagePositionIndex
+
+    tmp = temp_file()
+    open(tmp.path, "wb").close()
+    r = GribCodesMessagePositionIndex(tmp.path)
+    assert len(r) == 0
+
+
+@pytest.mark.parametrize("mode", ["file", "pread", "mmap"])
+def test_grib_reader_mode(mode):
+    ref = from_source("file", "docs/examples/tuv_pl.grib")
+    ref_values = ref.to_numpy()
+
+    with settings.temporary({"message-reader-mode": mode}):
+        ds = from_source("file", "docs/examples/tuv_pl.grib")
+        assert ds.metadata("param") == ref.metadata("param")
+        assert ds[4].handle.offset == ref[4].handle.offset
+        assert np.array_equal(ds.to_numpy(), ref_values)
+
+        # many threads reading from the same file
+        ds = from_source("file", "docs/examples/tuv_pl.grib")
+        with settings.temporary("number-of-decode-threads", 6):
+            assert np.array_equal(ds.to_numpy(), ref_values)
+
+
 if __name__ == "__main__":
     from earthkit.data.testing import main
 
@@ -65,6 +65,67 @@ def test_reader_padding_bytes(file_path, expected_type, expected_len):
             assert len(ds) == expected_len
 
 
+def _padded_messages(path, marker):
+    from earthkit.data.readers.bufr.bufr import BufrCodesMessagePositionIndex
+    from earthkit.data.readers.grib.codes import GribCodesMessagePositionIndex
+
+    cls = GribCodesMessagePositionIndex
+    if marker == b"BUFR":
+        cls = BufrCodesMessagePositionIndex
+
+    ref = cls(path)
+    with open(path, "rb") as f:
+        data = f.read()
+
+    # padding, truncated markers and false messages without an end marker
+    padding = [
+        b"",
+        bytes(20),
+        marker[:3],
+        marker + bytes([0, 0, 64, 2]) + bytes(8) + marker + bytes(100),
+        b"7777" * 5,
+        bytes(1000),
+    ]
+
+    tmp = temp_file()
+    offsets = []
+    with open(tmp.path, "wb") as f:
+        for i, (offset, length) in enumerate(zip(ref.offsets, ref.lengths)):
+            f.write(padding[i % len(padding)])
+            offsets.append(f.tell())
+            f.write(data[offset : offset + length])
+        f.write(marker + bytes(10))
+
+    return cls, tmp, offsets, ref.lengths.tolist()
+
+
+@pytest.mark.parametrize(
+    "file_path,marker", [("test6.grib", b"GRIB"), ("temp_10.bufr", b"BUFR")]
+)
+@pytest.mark.parametrize("nthreads", [1, 2, 3, 16])
+def test_reader_padding_bytes_between_messages(
+    file_path, marker, nthreads, monkeypatch
+):
+    from earthkit.data.utils.message import CodesMessagePositionIndex, FileBuffer
+
+    cls, tmp, offsets, lengths = _padded_messages(
+        earthkit_examples_file(file_path), marker
+    )
+
+    # split even small files and read them in small blocks
+    monkeypatch.setattr(CodesMessagePositionIndex, "MIN_SCAN_RANGE", 1)
+    monkeypatch.setattr(FileBuffer, "BLOCK_SIZE", 64)
+
+    with settings.temporary("number-of-message-scan-threads", nthreads):
+        r = cls(tmp.path)
+
+    assert r.offsets.tolist() == offsets
+    assert r.lengths.tolist() == lengths
+
+    ds = from_source("file", tmp.path)
+    assert len(ds) == len(offsets)
+
+
 if __name__ == "__main__":
     from earthkit.data.testing import main
 
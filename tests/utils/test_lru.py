@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+# (C) Copyright 2020 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+#
+
+
+import numpy as np
+import pytest
+
+from earthkit.data.utils.lru import ArrayLRUCache, HandleLRUCache
+
+
+def test_array_lru_cache():
+    c = ArrayLRUCache()
+    a = np.zeros(10)  # 80 bytes
+    b = np.ones(10)
+
+    assert c.get("a") is None
+    assert c.put("a", a, 200) is a
+    assert not a.flags.writeable
+    assert c.get("a") is a
+
+    c.put("b", b, 200)
+    # "a" is the most recently used
+    c.get("a")
+    c.put("c", np.ones(6), 200)
+    assert c.get("b") is None
+    assert c.get("a") is a
+    assert len(c) == 2
+
+    assert c.info() == dict(hits=3, misses=2, evictions=1, count=2, size=128)
+
+    # arrays larger than the limit are not stored
+    c.put("d", np.zeros(30), 200)
+    assert c.get("d") is None
+
+    with pytest.raises(ValueError):
+        a[0] = 1
+
+    c.clear()
+    assert c.info() == dict(hits=0, misses=0, evictions=0, count=0, size=0)
+
+
+def test_handle_lru_cache():
+    class Owner:
+        def __init__(self):
+            self.handle = True
+
+        def _release_handle(self):
+            self.handle = None
+
+    c = HandleLRUCache()
+    a, b, d = Owner(), Owner(), Owner()
+    c.add(a, 100, 250)
+    c.add(b, 100, 250)
+    c.touch(a)
+    c.add(d, 100, 250)
+    # "b" is the least recently used
+    assert b.handle is None
+    assert a.handle and d.handle
+    assert c.info() == dict(releases=1, count=2, size=200)
+
+    # the handle of the last added object is kept
+    e = Owner()
+    c.add(e, 1000, 250)
+    assert e.handle
+    assert a.handle is None and d.handle is None
+    assert c.info() == dict(releases=3, count=1, size=1000)
+
+    # deleted objects are removed
+    del e
+    assert c.info() == dict(releases=3, count=0, size=0)
+
+    c.add(a, 100, 250)
+    c.clear()
+    assert c.info() == dict(releases=0, count=0, size=0)
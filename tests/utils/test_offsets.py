@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+# (C) Copyright 2020 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+#
+
+
+import pytest
+
+from earthkit.data.utils.offsets import CumulativeLengths
+
+
+class Sized:
+    def __init__(self, n):
+        self.n = n
+        self.calls = 0
+
+    def __len__(self):
+        self.calls += 1
+        return self.n
+
+
+def test_cumulative_lengths():
+    parts = [Sized(3), Sized(0), Sized(2), Sized(4)]
+    c = CumulativeLengths(parts)
+
+    # only the first part is queried
+    assert c.locate(2) == (0, 2)
+    assert [p.calls for p in parts] == [1, 0, 0, 0]
+
+    assert c.locate(3) == (2, 0)
+    assert c.locate(5) == (3, 0)
+    assert c.locate(8) == (3, 3)
+    assert c.locate(-1) == (3, 3)
+    assert c.locate(-9) == (0, 0)
+    assert len(c) == 9
+    assert c.all() == [0, 3, 3, 5, 9]
+    assert [p.calls for p in parts] == [1, 1, 1, 1]
+
+    for n in (9, -10):
+        with pytest.raises(IndexError):
+            c.locate(n)
+
+
+def test_cumulative_lengths_empty():
+    c = CumulativeLengths([])
+    assert len(c) == 0
+    with pytest.raises(IndexError):
+        c.locate(0)
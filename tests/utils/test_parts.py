@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+# (C) Copyright 2020 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+#
+
+
+from earthkit.data.utils.parts import coalesce
+
+
+def test_coalesce():
+    ranges = [
+        ("b", 0, 10),
+        ("a", 100, 10),
+        ("a", 0, 10),
+        ("a", 10, 20),
+        ("a", 35, 10),
+        ("a", 10, 20),
+        ("a", 500, 50),
+    ]
+
+    r = coalesce(ranges, max_gap=5, max_size=100)
+    assert r == [
+        ("a", 0, 45, [2, 3, 5, 4]),
+        ("a", 100, 10, [1]),
+        ("a", 500, 50, [6]),
+        ("b", 0, 10, [0]),
+    ]
+
+    # the size of the merged ranges is limited
+    r = coalesce(ranges, max_gap=1000, max_size=100)
+    assert r == [
+        ("a", 0, 45, [2, 3, 5, 4]),
+        ("a", 100, 10, [1]),
+        ("a", 500, 50, [6]),
+        ("b", 0, 10, [0]),
+    ]
+
+    r = coalesce(ranges, max_gap=1000, max_size=1000)
+    assert r == [("a", 0, 550, [2, 3, 5, 4, 1, 6]), ("b", 0, 10, [0])]
+
+    assert coalesce([]) == []
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+
+# (C) Copyright 2020 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+#
+
+import threading
+import time
+
+import pytest
+
+from earthkit.data import from_source, settings
+from earthkit.data.readers.grib.codes import GribCodesReader
+from earthkit.data.testing import earthkit_examples_file
+from earthkit.data.utils.message import ReaderLRUCache
+
+
+def test_reader_lru_cache():
+    c = ReaderLRUCache()
+    paths = [
+        earthkit_examples_file(name)
+        for name in ("test.grib", "test6.grib", "tuv_pl.grib")
+    ]
+
+    with settings.temporary("message-reader-cache-size", 2):
+        r0 = c[(paths[0], GribCodesReader)]
+        r1 = c[(paths[1], GribCodesReader)]
+        assert c[(paths[0], GribCodesReader)] is r0
+
+        # paths[1] is the least recently used
+        c[(paths[2], GribCodesReader)]
+        assert len(c) == 2
+        assert c[(paths[0], GribCodesReader)] is r0
+        assert c[(paths[1], GribCodesReader)] is not r1
+
+    assert c.info() == dict(hits=2, opens=4, evictions=2, count=2)
+
+    c.clear()
+    assert c.info() == dict(hits=0, opens=0, evictions=0, count=0)
+
+
+def test_reader_lru_cache_threads():
+    class SlowReader(GribCodesReader):
+        def __init__(self, path):
+            time.sleep(0.1)
+            super().__init__(path)
+
+    c = ReaderLRUCache()
+    path = earthkit_examples_file("test.grib")
+    readers = []
+
+    def get():
+        readers.append(c[(path, SlowReader)])
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # the reader is only created once
+    assert len(readers) == 8
+    assert all(r is readers[0] for r in readers)
+    assert c.info()["opens"] == 1
+
+    # other files are not blocked by a slow open
+    started = threading.Event()
+    release = threading.Event()
+
+    class BlockedReader(GribCodesReader):
+        def __init__(self, path):
+            started.set()
+            release.wait(10)
+            super().__init__(path)
+
+    t = threading.Thread(
+        target=lambda: c[(earthkit_examples_file("test6.grib"), BlockedReader)]
+    )
+    t.start()
+    assert started.wait(10)
+    c[(earthkit_examples_file("tuv_pl.grib"), GribCodesReader)]
+    # the other file was opened while the slow open is still in progress
+    assert c.info()["opens"] == 2
+    release.set()
+    t.join()
+    assert c.info()["opens"] == 3
+    assert not c._opening
+
+
+def test_reader_lru_cache_open_error():
+    class BadReader(GribCodesReader):
+        def __init__(self, path):
+            raise OSError(path)
+
+    c = ReaderLRUCache()
+    path = earthkit_examples_file("test.grib")
+    with pytest.raises(OSError):
+        c[(path, BadReader)]
+
+    assert not c._opening
+    assert c.info()["opens"] == 0
+    assert c[(path, GribCodesReader)] is not None
+
+
+def test_reader_lru_cache_many_files():
+    ds = from_source("file", earthkit_examples_file("test.grib"))
+    for _ in range(3):
+        ds = ds + from_source("file", earthkit_examples_file("test6.grib"))
+
+    with settings.temporary("message-reader-cache-size", 1):
+        assert len(ds.metadata("param")) == 20
+
+
+def test_reader_lru_cache_mmap_released():
+    c = ReaderLRUCache()
+    path = earthkit_examples_file("test.grib")
+
+    with settings.temporary(
+        {"message-reader-mode": "mmap", "message-reader-cache-size": 1}
+    ):
+        h = c[(path, GribCodesReader)].at_offset(0, 526)
+        assert h.get("shortName") == "2t"
+        mapping = c[(path, GribCodesReader)]._mmap
+        assert not mapping.closed
+
+        c[(earthkit_examples_file("test6.grib"), GribCodesReader)]
+        assert mapping.closed
+        # the handle does not refer to the mapping
+        assert h.get("shortName") == "2t"
+
+
+@pytest.mark.parametrize("pread", [True, False])
+def test_reader_short_reads(monkeypatch, pread):
+    import os
+
+    path = earthkit_examples_file("test.grib")
+    with open(path, "rb") as f:
+        ref = f.read()
+
+    r = GribCodesReader(path)
+    if pread:
+        _pread = os.pread
+        monkeypatch.setattr(
+            os, "pread", lambda fd, n, offset: _pread(fd, min(n, 100), offset)
+        )
+    else:
+        monkeypatch.delattr(os, "pread", raising=False)
+        _read = r.file.read
+        monkeypatch.setattr(r.file, "read", lambda n: _read(min(n, 100)))
+
+    with settings.temporary("message-reader-mode", "pread"):
+        assert r.read(10, 526) == ref[10:536]
+        with pytest.raises(EOFError):
+            r.read(len(ref) - 10, 20)
+
+
+def test_reader_mmap_read_view():
+    path = earthkit_examples_file("test.grib")
+    r = GribCodesReader(path)
+
+    with settings.temporary("message-reader-mode", "mmap"):
+        # the bytes are not copied from the mapping
+        buf = r.read(0, 526)
+        assert isinstance(buf, memoryview)
+        h = r.from_message(buf[:526], 0)
+        del buf
+        assert h.get("shortName") == "2t"